@@ -0,0 +1,93 @@
+"""Замер времени запуска бота: импорт и время до первого запроса к API.
+
+Каждый замер идёт в отдельном процессе, чтобы модули не были уже
+загружены. Запуск: ``python benchmark.py``.
+"""
+import json
+import os
+import subprocess
+import sys
+
+IMPORT_BUDGET = 0.3
+FIRST_POLL_BUDGET = 1.0
+HEAVY_MODULES = ('requests', 'telegram')
+PROBE_ENV = {
+    'PRACTICUM_TOKEN': 'sometoken',
+    'TELEGRAM_TOKEN': '1234:abcdefg',
+    'TELEGRAM_CHAT_ID': '12345',
+}
+
+PROBE = '''
+import json
+import sys
+import time
+
+started = time.perf_counter()
+import homework
+imported = time.perf_counter()
+loaded = [name for name in {modules!r} if name in sys.modules]
+
+
+class Polled(Exception):
+    pass
+
+
+def get(*args, **kwargs):
+    raise Polled(time.perf_counter())
+
+
+homework.check_tokens()
+homework.telegram.Bot(token=homework.TELEGRAM_TOKEN)
+homework.requests.get = get
+try:
+    homework.get_api_answer(0)
+except Polled as polled:
+    first_poll = polled.args[0]
+print(json.dumps({{
+    'import': imported - started,
+    'first_poll': first_poll - started,
+    'loaded_on_import': loaded,
+}}))
+'''
+
+BUDGET_EXCEEDED = '{stage}: {seconds:.3f} с при бюджете {budget} с'
+
+
+def probe():
+    """Запускает бота в новом процессе до первого запроса к API."""
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(modules=HEAVY_MODULES)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, **PROBE_ENV),
+        capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def measure(runs=5):
+    """Возвращает лучшие из ``runs`` замеров: шум бывает только сверху."""
+    results = [probe() for _ in range(runs)]
+    return {
+        'import': min(result['import'] for result in results),
+        'first_poll': min(result['first_poll'] for result in results),
+        'loaded_on_import': sorted(set().union(
+            *(result['loaded_on_import'] for result in results))),
+    }
+
+
+def over_budget(result):
+    """Возвращает описания превышенных бюджетов."""
+    return [
+        BUDGET_EXCEEDED.format(stage=stage, seconds=result[stage],
+                               budget=budget)
+        for stage, budget in (('import', IMPORT_BUDGET),
+                              ('first_poll', FIRST_POLL_BUDGET))
+        if result[stage] > budget]
+
+
+if __name__ == '__main__':
+    result = measure()
+    print(json.dumps(result, indent=2))
+    errors = over_budget(result)
+    for error in errors:
+        print(error, file=sys.stderr)
+    sys.exit(1 if errors else 0)
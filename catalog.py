@@ -0,0 +1,129 @@
+import json
+from functools import lru_cache
+from string import Formatter
+
+CACHE_SIZE = 4096
+STATUS_FIELDS = ('homework_name', 'verdict')
+COMMENT_FIELDS = ('comment',)
+
+UNKNOWN_FIELD = 'Шаблон "{template}" содержит неизвестное поле "{field}"'
+UNSUPPORTED_FORMAT = (
+    'Шаблон "{template}" использует формат или преобразование поля "{field}"')
+UNKNOWN_LOCALE = 'Локаль по умолчанию "{locale}" отсутствует в каталоге'
+
+
+def compile_template(template, fields, **constants):
+    """Разбирает шаблон str.format в кортеж готовых к склейке частей.
+
+    Строки в результате вставляются как есть, поля хранятся кортежем из
+    одного имени. Значения ``constants`` подставляются сразу.
+    """
+    pieces = []
+    for literal, field, spec, conversion in Formatter().parse(template):
+        if literal:
+            pieces.append(literal)
+        if field is None:
+            continue
+        if field not in fields:
+            raise ValueError(
+                UNKNOWN_FIELD.format(template=template, field=field))
+        if spec or conversion:
+            raise ValueError(
+                UNSUPPORTED_FORMAT.format(template=template, field=field))
+        pieces.append(constants[field] if field in constants else (field,))
+    merged = []
+    for piece in pieces:
+        if merged and isinstance(piece, str) and isinstance(merged[-1], str):
+            merged[-1] += piece
+        else:
+            merged.append(piece)
+    return tuple(merged)
+
+
+def render_template(pieces, values):
+    """Собирает строку из частей скомпилированного шаблона."""
+    return ''.join(
+        piece if isinstance(piece, str) else str(values[piece[0]])
+        for piece in pieces)
+
+
+class MessageCatalog:
+    """Каталог сообщений о статусах домашек по локалям.
+
+    Шаблоны компилируются при создании каталога, готовые сообщения
+    кешируются в ограниченном LRU по имени работы, статусу, комментарию и
+    локали. Статус, которого нет в локали, берётся из локали по умолчанию.
+    """
+
+    def __init__(self, locales, default_locale, show_comments=False,
+                 cache_size=CACHE_SIZE):
+        """Компилирует шаблоны; без локали по умолчанию — ValueError."""
+        if default_locale not in locales:
+            raise ValueError(UNKNOWN_LOCALE.format(locale=default_locale))
+        self.default_locale = default_locale
+        self.show_comments = show_comments
+        self.templates = {}
+        self.comments = {}
+        for locale, spec in locales.items():
+            for status, verdict in spec.get('verdicts', {}).items():
+                self.templates[locale, status] = compile_template(
+                    spec.get('status', locales[default_locale]['status']),
+                    STATUS_FIELDS, verdict=verdict)
+            if spec.get('comment'):
+                self.comments[locale] = compile_template(
+                    spec['comment'], COMMENT_FIELDS)
+        self.render_cached = lru_cache(maxsize=cache_size)(self.render_text)
+
+    @classmethod
+    def load(cls, path, locales, default_locale, **kwargs):
+        """Создаёт каталог, дополняя встроенные локали данными из файла.
+
+        Файл — JSON с ключами ``default_locale``, ``show_comments`` и
+        ``locales``; у локали могут быть шаблоны ``status``, ``comment`` и
+        словарь ``verdicts``, в том числе для новых статусов.
+        """
+        locales = {
+            locale: dict(spec, verdicts=dict(spec.get('verdicts', {})))
+            for locale, spec in locales.items()}
+        if path:
+            with open(path, encoding='utf-8') as file:
+                config = json.load(file)
+            for locale, spec in config.get('locales', {}).items():
+                merged = locales.setdefault(locale, {'verdicts': {}})
+                merged['verdicts'].update(spec.get('verdicts', {}))
+                merged.update(
+                    (key, value) for key, value in spec.items()
+                    if key != 'verdicts')
+            default_locale = config.get('default_locale', default_locale)
+            kwargs.setdefault(
+                'show_comments', config.get('show_comments', False))
+        return cls(locales, default_locale, **kwargs)
+
+    def resolve(self, status, locale=None):
+        """Возвращает локаль, в которой есть шаблон для статуса, или None."""
+        for candidate in (locale, self.default_locale):
+            if (candidate, status) in self.templates:
+                return candidate
+        return None
+
+    def knows(self, status, locale=None):
+        """Проверяет, есть ли шаблон для статуса."""
+        return self.resolve(status, locale) is not None
+
+    def render_text(self, name, status, comment, locale):
+        """Собирает текст сообщения по найденной локали."""
+        text = render_template(
+            self.templates[locale, status], {'homework_name': name})
+        if comment and locale in self.comments:
+            text += render_template(
+                self.comments[locale], {'comment': comment})
+        return text
+
+    def render(self, homework, locale=None):
+        """Возвращает сообщение о статусе домашки в нужной локали."""
+        locale = self.resolve(homework.status, locale)
+        if locale is None:
+            raise KeyError(homework.status)
+        comment = homework.reviewer_comment if self.show_comments else None
+        return self.render_cached(
+            homework.name, homework.status, comment, locale)
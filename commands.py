@@ -0,0 +1,190 @@
+import logging
+import threading
+from collections import deque
+
+from models import Homework
+
+HISTORY_SIZE = 20
+LONG_POLL_TIMEOUT = 30
+COMMANDS = ('/status', '/history')
+NAMESPACE = 'board'
+OFFSET_KEY = 'commands'
+
+NO_DATA = 'Пока нет данных о домашних работах.'
+UNKNOWN_COMMAND = 'Доступные команды: /status, /history'
+COMMAND_FAILED = 'Не удалось обработать команды бота: {error}'
+
+logger = logging.getLogger(__name__)
+
+
+class StatusBoard:
+    """Последние известные статусы домашек и история переходов по чатам.
+
+    Заполняется из уже полученных ответов API, поэтому ответ на команду не
+    требует запросов к API. Готовые тексты ответов кешируются по команде и
+    локали до следующего изменения данных чата. При наличии хранилища
+    состояние чата сохраняется в нём; чаты, которые опрашивает другой
+    воркер, читаются из хранилища.
+    """
+
+    def __init__(self, render, history_size=HISTORY_SIZE, store=None):
+        """``render(homework, locale)`` собирает строку ответа."""
+        self.render = render
+        self.history_size = history_size
+        self.store = store
+        self.chats = {}
+        self.local = set()
+        self.replies = {}
+        self.lock = threading.Lock()
+
+    def chat(self, chat_id):
+        """Возвращает последние статусы и историю чата."""
+        if chat_id in self.local or self.store is None:
+            return self.chats.setdefault(
+                chat_id, ({}, deque(maxlen=self.history_size)))
+        saved = self.store.get(NAMESPACE, str(chat_id), {})
+        latest = {
+            homework.id: homework for homework in
+            (Homework(*values) for values in saved.get('latest', []))}
+        history = deque(
+            (Homework(*values) for values in saved.get('history', [])),
+            maxlen=self.history_size)
+        return latest, history
+
+    def update(self, chat_id, homework):
+        """Запоминает статус домашки, полученный при опросе API."""
+        with self.lock:
+            latest, history = self.chats[chat_id] = self.chat(chat_id)
+            self.local.add(chat_id)
+            previous = latest.get(homework.id)
+            if previous == homework:
+                return
+            latest[homework.id] = homework
+            if previous is None or previous.status != homework.status:
+                history.append(homework)
+            self.replies.pop(chat_id, None)
+            if self.store is not None:
+                self.store.set(NAMESPACE, str(chat_id), {
+                    'latest': [item.astuple() for item in latest.values()],
+                    'history': [item.astuple() for item in history]})
+
+    def forget(self, chat_ids):
+        """Сбрасывает чаты в памяти, дальше они читаются из хранилища."""
+        with self.lock:
+            for chat_id in chat_ids:
+                self.chats.pop(chat_id, None)
+                self.local.discard(chat_id)
+                self.replies.pop(chat_id, None)
+
+    def is_empty(self, chat_id):
+        """Проверяет, что о домашках чата ещё нет данных."""
+        with self.lock:
+            return not self.chat(chat_id)[0]
+
+    def has_status(self, chat_id, status):
+        """Проверяет, есть ли в чате домашка с таким текущим статусом."""
+        with self.lock:
+            return any(
+                homework.status == status
+                for homework in self.chat(chat_id)[0].values())
+
+    def reply(self, chat_id, command, locale=None):
+        """Возвращает текст ответа на команду из последних статусов."""
+        if command not in COMMANDS:
+            return UNKNOWN_COMMAND
+        key = (command, locale)
+        text = self.replies.get(chat_id, {}).get(key)
+        if text is not None:
+            return text
+        with self.lock:
+            latest, history = self.chat(chat_id)
+            if command == '/status':
+                homeworks = sorted(
+                    latest.values(),
+                    key=lambda homework: homework.date_updated or 0,
+                    reverse=True)
+            else:
+                homeworks = reversed(history)
+            lines = [self.render(homework, locale) for homework in homeworks]
+            text = '\n\n'.join(lines) if lines else NO_DATA
+            if chat_id in self.local or self.store is None:
+                self.replies.setdefault(chat_id, {})[key] = text
+        return text
+
+
+class CommandPoller:
+    """Принимает команды боту через long polling getUpdates.
+
+    Работает в отдельном потоке, отвечает только известным чатам. Если
+    задан ``leader``, обновления забирает только воркер, для которого он
+    возвращает True: Telegram не допускает параллельных getUpdates.
+    Смещение последнего обработанного обновления хранится в хранилище,
+    чтобы после перезапуска не отвечать на команды повторно.
+    """
+
+    def __init__(self, bot, board, send, chats, store=None,
+                 timeout=LONG_POLL_TIMEOUT, leader=None):
+        """``send(bot, chat_id, text)`` отправляет ответ в чат."""
+        self.bot = bot
+        self.board = board
+        self.send = send
+        self.chats = chats
+        self.store = store
+        self.timeout = timeout
+        self.leader = leader
+        self.offset = None
+        if store is not None:
+            self.offset = store.get(OFFSET_KEY, 'offset')
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def handle(self, update):
+        """Отвечает на команду из сообщения известного чата."""
+        message = update.message
+        if message is None or not message.text:
+            return
+        chat_id = message.chat_id
+        tenant = self.chats.get(str(chat_id))
+        if tenant is None:
+            return
+        command = message.text.split()[0].split('@')[0].lower()
+        self.send(self.bot, tenant.chat_id,
+                  self.board.reply(tenant.chat_id, command, tenant.locale))
+
+    def poll(self):
+        """Обрабатывает одну порцию обновлений."""
+        updates = self.bot.get_updates(
+            offset=self.offset, timeout=self.timeout,
+            allowed_updates=['message'])
+        for update in updates:
+            self.offset = update.update_id + 1
+            try:
+                self.handle(update)
+            except Exception as error:
+                logger.exception(COMMAND_FAILED.format(error=error))
+        if updates and self.store is not None:
+            self.store.set(OFFSET_KEY, 'offset', self.offset)
+        return len(updates)
+
+    def run(self):
+        """Принимает обновления до остановки, переживая ошибки."""
+        while not self.stopped.is_set():
+            try:
+                if self.leader is not None and not self.leader():
+                    self.stopped.wait(self.timeout)
+                    continue
+                self.poll()
+            except Exception as error:
+                logger.exception(COMMAND_FAILED.format(error=error))
+                self.stopped.wait(self.timeout)
+
+    def start(self):
+        """Запускает приём команд в фоновом потоке."""
+        self.thread = threading.Thread(
+            target=self.run, name='commands', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Просит поток остановиться после текущего запроса."""
+        self.stopped.set()
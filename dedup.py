@@ -0,0 +1,84 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+TTL = 7 * 24 * 60 * 60
+MAX_PER_CHAT = 1024
+NAMESPACE = 'dedup:{chat_id}'
+
+
+def digest(*parts):
+    """Возвращает короткий хеш набора значений."""
+    return hashlib.blake2b(
+        '\0'.join(map(str, parts)).encode(), digest_size=8).hexdigest()
+
+
+class DedupIndex:
+    """Окно дедупликации доставленных сообщений.
+
+    Ключ — хеш (чат, предмет сообщения, статус), значение — версия
+    перехода (например, ``date_updated`` домашки) и срок жизни записи.
+    Повтор того же статуса с новой версией считается новым переходом.
+    На каждый чат в памяти хранится не больше ``max_per_chat`` записей,
+    вытесняются давно не использованные; при наличии хранилища записи
+    переживают перезапуск.
+    """
+
+    def __init__(self, ttl=TTL, max_per_chat=MAX_PER_CHAT, store=None,
+                 clock=time.time):
+        """``ttl`` — срок жизни записи в секундах."""
+        self.ttl = ttl
+        self.max_per_chat = max_per_chat
+        self.store = store
+        self.clock = clock
+        self.chats = {}
+        self.lock = threading.Lock()
+
+    def lookup(self, chat_id, key):
+        """Ищет живую запись в памяти, затем в хранилище."""
+        entries = self.chats.setdefault(chat_id, OrderedDict())
+        entry = entries.get(key)
+        if entry is None and self.store is not None:
+            entry = self.store.get(NAMESPACE.format(chat_id=chat_id), key)
+            if entry is not None:
+                entry = tuple(entry)
+                self.put(entries, key, entry)
+        if entry is None:
+            return None
+        if entry[1] <= self.clock():
+            del entries[key]
+            return None
+        entries.move_to_end(key)
+        return entry
+
+    def put(self, entries, key, entry):
+        """Кладёт запись, вытесняя давно не использованные."""
+        entries[key] = entry
+        entries.move_to_end(key)
+        while len(entries) > self.max_per_chat:
+            entries.popitem(last=False)
+
+    def forget(self, chat_ids):
+        """Сбрасывает записи чатов в памяти; хранилище не меняется."""
+        with self.lock:
+            for chat_id in chat_ids:
+                self.chats.pop(chat_id, None)
+
+    def is_new(self, chat_id, subject, status, version=None):
+        """Проверяет, что переход ещё не доставлялся в чат."""
+        with self.lock:
+            entry = self.lookup(chat_id, digest(chat_id, subject, status))
+        return entry is None or entry[0] != version
+
+    def remember(self, chat_id, subject, status, version=None):
+        """Запоминает доставленный переход."""
+        key = digest(chat_id, subject, status)
+        entry = (version, self.clock() + self.ttl)
+        with self.lock:
+            self.put(
+                self.chats.setdefault(chat_id, OrderedDict()), key, entry)
+        if self.store is not None:
+            self.store.set(
+                NAMESPACE.format(chat_id=chat_id), key, entry,
+                expires=entry[1])
@@ -0,0 +1,277 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+NAMESPACE = 'messages:{chat_id}'
+MESSAGE_LIMIT = 4096
+SEPARATOR = '\n\n'
+LINGER = 2
+MAX_BATCH = 10
+RETRY_DELAY = 5
+MAX_RETRY_DELAY = 300
+
+BATCH_FAILED = 'Не удалось отправить пачку сообщений в чат {chat_id}: {error}'
+BATCH_DELAYED = (
+    'Доставлено {delivered} из {total} сообщений в чат {chat_id}, '
+    'повтор через {delay} с')
+
+logger = logging.getLogger(__name__)
+
+Entry = namedtuple('Entry', ('chat_id', 'key', 'text', 'version', 'on_sent'))
+
+
+class LiveMessages:
+    """Идентификаторы «живых» сообщений: одно сообщение на домашку в чате.
+
+    При наличии хранилища идентификаторы сохраняются в нём, чтобы после
+    перезапуска продолжать редактировать те же сообщения.
+    """
+
+    def __init__(self, store=None):
+        """Без хранилища идентификаторы живут только в памяти."""
+        self.store = store
+        self.ids = {}
+
+    def get(self, chat_id, subject):
+        """Возвращает id сообщения о предмете или None."""
+        key = (chat_id, subject)
+        if key not in self.ids and self.store is not None:
+            self.ids[key] = self.store.get(
+                NAMESPACE.format(chat_id=chat_id), str(subject))
+        return self.ids.get(key)
+
+    def forget(self, chat_ids):
+        """Сбрасывает идентификаторы чатов в памяти."""
+        self.ids = {
+            key: message_id for key, message_id in self.ids.items()
+            if key[0] not in chat_ids}
+
+    def set(self, chat_id, subject, message_id):
+        """Запоминает id сообщения о предмете."""
+        self.ids[chat_id, subject] = message_id
+        if self.store is not None:
+            self.store.set(
+                NAMESPACE.format(chat_id=chat_id), str(subject), message_id)
+
+
+def pack(texts, limit=MESSAGE_LIMIT, separator=SEPARATOR):
+    """Склеивает тексты по порядку в сообщения не длиннее ``limit``.
+
+    Возвращает список пар (сколько текстов вошло, сообщения). Текст длиннее
+    ``limit`` режется на несколько сообщений.
+    """
+    groups = []
+    current = []
+    size = 0
+    for text in texts:
+        extra = len(text) + (len(separator) if current else 0)
+        if current and (size + extra > limit or len(text) > limit):
+            groups.append((len(current), [separator.join(current)]))
+            current, size, extra = [], 0, len(text)
+        if len(text) > limit:
+            groups.append((1, [
+                text[start:start + limit]
+                for start in range(0, len(text), limit)]))
+            continue
+        current.append(text)
+        size += extra
+    if current:
+        groups.append((len(current), [separator.join(current)]))
+    return groups
+
+
+class Outbox:
+    """Очередь уведомлений с объединением сообщений по чатам.
+
+    Сообщения чата копятся не дольше ``linger`` секунд с момента первого
+    и уходят пачкой до ``max_batch`` штук. ``send(chat_id, entries)``
+    отправляет пачку и возвращает, сколько сообщений с начала пачки
+    доставлено; остальные возвращаются в начало очереди чата и повторяются
+    с растущей задержкой, порядок сохраняется. Для сообщения, разрезанного
+    на части, очередь помнит, сколько частей уже доставлено, чтобы повтор
+    не дублировал их.
+
+    С ``scheduler`` созревшие чаты отправляются в порядке справедливой
+    очереди с весами ``weight(chat_id)``, с ``quota`` — не больше квоты
+    сообщений на чат; сообщения сверх квоты ждут её восстановления.
+    """
+
+    def __init__(self, send, linger=LINGER, max_batch=MAX_BATCH,
+                 retry_delay=RETRY_DELAY, scheduler=None, quota=None,
+                 weight=None, clock=time.monotonic):
+        """``retry_delay`` — первая задержка повтора в секундах."""
+        self.send = send
+        self.linger = linger
+        self.max_batch = max_batch
+        self.retry_delay = retry_delay
+        self.scheduler = scheduler
+        self.quota = quota
+        self.weight = weight
+        self.clock = clock
+        self.chats = OrderedDict()
+        self.due = {}
+        self.failures = {}
+        self.keys = set()
+        self.sending = {}
+        self.parts = {}
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.thread = None
+
+    def put(self, entry):
+        """Ставит сообщение в очередь, если такого перехода в ней нет."""
+        with self.condition:
+            if entry.key in self.keys:
+                return None
+            self.keys.add(entry.key)
+            queue = self.chats.setdefault(entry.chat_id, deque())
+            queue.append(entry)
+            if entry.chat_id not in self.due:
+                self.due[entry.chat_id] = self.clock() + self.linger
+            if len(queue) >= self.max_batch:
+                self.due[entry.chat_id] = min(
+                    self.due[entry.chat_id], self.clock())
+            self.condition.notify()
+            return True
+
+    def queued(self, key):
+        """Проверяет, ждёт ли переход отправки."""
+        return key in self.keys
+
+    def pending_versions(self, chat_id):
+        """Возвращает версии переходов чата, ждущих или идущих отправки."""
+        with self.condition:
+            return [
+                entry.version for entry in (
+                    *self.sending.get(chat_id, ()),
+                    *self.chats.get(chat_id, ()))
+                if entry.version is not None]
+
+    def parts_sent(self, key):
+        """Сколько частей разрезанного сообщения уже доставлено."""
+        with self.condition:
+            return self.parts.get(key, 0)
+
+    def part_sent(self, key):
+        """Учитывает доставку очередной части разрезанного сообщения."""
+        with self.condition:
+            self.parts[key] = self.parts.get(key, 0) + 1
+
+    def depth(self):
+        """Возвращает число сообщений в очереди."""
+        return len(self.keys)
+
+    def take(self, force=False):
+        """Забирает пачки чатов, которым пора отправляться."""
+        now = self.clock()
+        batches = []
+        with self.condition:
+            ready = [
+                chat_id for chat_id, queue in self.chats.items()
+                if queue and (force or self.due[chat_id] <= now)]
+            if self.scheduler is not None:
+                ready = self.scheduler.order(ready)
+            for chat_id in ready:
+                queue = self.chats[chat_id]
+                count = min(self.max_batch, len(queue))
+                if self.quota is not None:
+                    count = self.quota.take(chat_id, count)
+                    if not count:
+                        self.due[chat_id] = now + self.quota.wait(chat_id)
+                        continue
+                entries = [queue.popleft() for _ in range(count)]
+                self.sending[chat_id] = entries
+                batches.append((chat_id, entries))
+        return batches
+
+    def settle(self, chat_id, entries, delivered):
+        """Снимает доставленные, остальные возвращает в очередь."""
+        with self.condition:
+            queue = self.chats[chat_id]
+            self.sending.pop(chat_id, None)
+            for entry in entries[:delivered]:
+                self.keys.discard(entry.key)
+                self.parts.pop(entry.key, None)
+            queue.extendleft(reversed(entries[delivered:]))
+            if delivered < len(entries):
+                failures = self.failures.get(chat_id, 0) + 1
+                self.failures[chat_id] = failures
+                delay = min(
+                    self.retry_delay * 2 ** (failures - 1), MAX_RETRY_DELAY)
+                self.due[chat_id] = self.clock() + delay
+                logger.warning(BATCH_DELAYED.format(
+                    delivered=delivered, total=len(entries),
+                    chat_id=chat_id, delay=delay))
+            elif queue:
+                self.failures.pop(chat_id, None)
+                self.due[chat_id] = self.clock() + (
+                    0 if len(queue) >= self.max_batch else self.linger)
+            else:
+                self.failures.pop(chat_id, None)
+                del self.chats[chat_id]
+                del self.due[chat_id]
+
+    def flush(self, force=False):
+        """Отправляет созревшие пачки, возвращает число доставленных."""
+        total = 0
+        for chat_id, entries in self.take(force):
+            delivered = 0
+            try:
+                delivered = self.send(chat_id, entries)
+            except Exception as error:
+                logger.exception(
+                    BATCH_FAILED.format(chat_id=chat_id, error=error))
+            for entry in entries[:delivered]:
+                if entry.on_sent is not None:
+                    entry.on_sent()
+            if self.scheduler is not None:
+                self.scheduler.charge(
+                    chat_id, len(entries),
+                    1 if self.weight is None else self.weight(chat_id))
+            self.settle(chat_id, entries, delivered)
+            total += delivered
+        return total
+
+    def next_due(self):
+        """Секунд до ближайшей пачки или None при пустой очереди."""
+        with self.condition:
+            if not self.due:
+                return None
+            return max(0, min(self.due.values()) - self.clock())
+
+    def run(self):
+        """Отправляет созревшие пачки до остановки."""
+        while True:
+            with self.condition:
+                if self.stopped:
+                    return
+                self.condition.wait(self.next_due())
+                if self.stopped:
+                    return
+            self.flush()
+
+    def start(self):
+        """Запускает отправку в фоновом потоке."""
+        self.thread = threading.Thread(
+            target=self.run, name='outbox', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Останавливает поток и досылает очередь, пока не истёк timeout.
+
+        Ожидание потока и досылка укладываются в один общий срок.
+        """
+        deadline = None if timeout is None else self.clock() + timeout
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(
+                None if deadline is None
+                else max(0, deadline - self.clock()))
+        while self.depth() and (deadline is None or self.clock() < deadline):
+            if not self.flush(force=True):
+                break
+        return self.depth()
@@ -0,0 +1,181 @@
+import json
+import logging
+import os
+import threading
+import time
+from http import HTTPStatus
+
+from lazy import LazyModule
+
+BUSY_TIMEOUT = 60
+IDLE_GRACE = 30
+READY_TIMEOUT = 1800
+SEND_FAILURES = 3
+HOST = '127.0.0.1'
+
+CHECK_FAILED = 'Проверка подсистемы {name} не прошла: {error}'
+WORKER_STUCK = 'Основной цикл не отвечает {age:.0f} с, процесс завершается'
+
+logger = logging.getLogger(__name__)
+http_server = LazyModule('http.server')
+
+
+class Health:
+    """Живость и готовность воркера.
+
+    Живость — по пульсу основного цикла: во время работы пульс должен
+    обновляться не реже ``busy_timeout`` секунд, во время сна цикл обязан
+    проснуться к объявленному сроку. Готовность — по возрасту последнего
+    успешного опроса API и по числу неудачных отправок в Telegram подряд.
+    Состояние подсистем отдают зарегистрированные проверки.
+    """
+
+    def __init__(self, busy_timeout=BUSY_TIMEOUT, idle_grace=IDLE_GRACE,
+                 ready_timeout=READY_TIMEOUT, send_failures=SEND_FAILURES,
+                 clock=time.monotonic):
+        """Пороги в секундах; ``send_failures`` — отправок подряд."""
+        self.busy_timeout = busy_timeout
+        self.idle_grace = idle_grace
+        self.ready_timeout = ready_timeout
+        self.send_failures = send_failures
+        self.clock = clock
+        self.started = clock()
+        self.last_beat = self.started
+        self.idle_until = None
+        self.events = {}
+        self.checks = {}
+
+    def beat(self):
+        """Отмечает, что основной цикл работает."""
+        self.last_beat = self.clock()
+        self.idle_until = None
+
+    def idle(self, seconds):
+        """Отмечает, что цикл засыпает на ``seconds`` секунд."""
+        self.last_beat = self.clock()
+        self.idle_until = self.last_beat + seconds
+
+    def record(self, event, ok=True):
+        """Запоминает исход опроса или отправки."""
+        now = self.clock()
+        last_ok, last_error, failures = self.events.get(
+            event, (None, None, 0))
+        if ok:
+            self.events[event] = (now, last_error, 0)
+        else:
+            self.events[event] = (last_ok, now, failures + 1)
+
+    def register(self, name, check):
+        """Добавляет проверку подсистемы, возвращающую словарь состояния."""
+        self.checks[name] = check
+
+    def alive(self):
+        """Проверяет, что цикл работает или спит не дольше срока."""
+        now = self.clock()
+        if self.idle_until is not None:
+            return now <= self.idle_until + self.idle_grace
+        return now - self.last_beat <= self.busy_timeout
+
+    def ready(self):
+        """Проверяет свежесть опроса и число неудачных отправок."""
+        now = self.clock()
+        last_poll, _, _ = self.events.get('poll', (None, None, 0))
+        if last_poll is None or now - last_poll > self.ready_timeout:
+            return False
+        _, _, send_failures = self.events.get('send', (None, None, 0))
+        return send_failures < self.send_failures
+
+    def subsystems(self):
+        """Собирает состояние подсистем; упавшая проверка — не ok."""
+        statuses = {}
+        for name, check in self.checks.items():
+            try:
+                statuses[name] = dict(check(), ok=True)
+            except Exception as error:
+                logger.warning(CHECK_FAILED.format(name=name, error=error))
+                statuses[name] = {'ok': False, 'error': str(error)}
+        return statuses
+
+    def report(self):
+        """Возвращает полный отчёт для /healthz."""
+        now = self.clock()
+        return {
+            'alive': self.alive(),
+            'ready': self.ready(),
+            'uptime': round(now - self.started, 3),
+            'heartbeat_age': round(now - self.last_beat, 3),
+            'events': {
+                event: {
+                    'last_ok_age': (
+                        None if last_ok is None else round(now - last_ok, 3)),
+                    'last_error_age': (
+                        None if last_error is None
+                        else round(now - last_error, 3)),
+                    'consecutive_failures': failures,
+                }
+                for event, (last_ok, last_error, failures)
+                in self.events.items()},
+            'subsystems': self.subsystems(),
+        }
+
+
+class HealthHandler:
+    """Отдаёт /livez, /readyz и полный отчёт /healthz.
+
+    Примешивается к BaseHTTPRequestHandler при запуске сервера, чтобы
+    http.server загружался, только когда эндпоинт включён.
+    """
+
+    def do_GET(self):
+        """Отвечает JSON-отчётом; 503, если проверка не прошла."""
+        health = self.server.health
+        if self.path == '/livez':
+            ok, body = health.alive(), {'alive': health.alive()}
+        elif self.path == '/readyz':
+            ok, body = health.ready(), {'ready': health.ready()}
+        elif self.path == '/healthz':
+            body = health.report()
+            ok = body['alive'] and body['ready']
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        payload = json.dumps(body).encode()
+        self.send_response(
+            HTTPStatus.OK if ok else HTTPStatus.SERVICE_UNAVAILABLE)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        """Пишет журнал запросов в отладочный лог."""
+        logger.debug(format, *args)
+
+
+def serve(health, port, host=HOST):
+    """Запускает HTTP-сервер проверок в фоновом потоке.
+
+    По умолчанию сервер слушает только локальный интерфейс.
+    """
+    handler = type('HealthHandler', (
+        HealthHandler, http_server.BaseHTTPRequestHandler), {})
+    server = http_server.ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.health = health
+    threading.Thread(
+        target=server.serve_forever, name='health', daemon=True).start()
+    return server
+
+
+def watchdog(health, interval=5):
+    """Завершает процесс при зависании цикла, чтобы его перезапустили."""
+    def check():
+        while True:
+            time.sleep(interval)
+            if not health.alive():
+                logger.critical(WORKER_STUCK.format(
+                    age=health.clock() - health.last_beat))
+                logging.shutdown()
+                os._exit(1)
+
+    threading.Thread(target=check, name='watchdog', daemon=True).start()
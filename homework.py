@@ -2,19 +2,58 @@ import logging
 import os
 import sys
 import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from operator import attrgetter
 from http import HTTPStatus
 
-import requests
-import telegram
 from dotenv import load_dotenv
 
+from catalog import MessageCatalog
+from commands import CommandPoller, StatusBoard
+from dedup import DedupIndex
+from delivery import MESSAGE_LIMIT, Entry, LiveMessages, Outbox, pack
+from health import Health, serve, watchdog
+from latency import LatencyTracker
+from lazy import LazyModule
+from limiter import AdaptiveLimiter
+from lifecycle import Lifecycle
+from models import Homework
+from scheduler import FairScheduler, Quota
+from settings import Settings
+from sharding import ShardCoordinator, default_worker_id
+from snapshot import REVIEWING, Record, Snapshot, write_snapshot
+from state import StateStore
+from streaming import ArrayStream, iter_text
+from tenants import Tenant, load_tenants
+from validation import (
+    BackgroundCheck, InvalidCredentials, Quarantine, validate)
+from window import PollWindow
+
+multiprocessing = LazyModule('multiprocessing')
+requests = LazyModule('requests')
+telegram = LazyModule('telegram')
+
 load_dotenv()
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
-RETRY_PERIOD = 600
+settings = Settings.from_env()
+RETRY_PERIOD = settings.retry_period
+RELOADABLE = (
+    'retry_period', 'tenants_file', 'message_catalog', 'message_locale')
+DEFAULT_LOCALE = 'ru'
+COMMANDS_LEASE = 'commands'
+RUN_ONCE_LEASE = 'run-once'
+DUE_SLACK = 0.1
+BACKFILL_PERIOD = 30 * 24 * 60 * 60
+POLLED_NAMESPACE = 'polled'
+SNAPSHOT_SUFFIX = '.snapshot'
+PRIORITY_STATUS = 'reviewing'
+INVALID_TOKEN_STATUSES = (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN)
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
@@ -26,29 +65,81 @@ HOMEWORK_VERDICTS = {
 TOKENS = ['PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID']
 
 SUCCESSFUL_SENT_MESSAGE = 'Сообщение {message} успешно отправлено'
+SUCCESSFUL_EDITED_MESSAGE = 'Сообщение {message_id} изменено на {message}'
+UNSUCCESSFUL_EDITED_MESSAGE = (
+    'Не удалось изменить сообщение {message_id}. Ошибка:{error}')
+NOT_MODIFIED = 'message is not modified'
 UNSUCCESSFUL_SENT_MESSAGE = (
     'Не удалось отправить сообщение "{message}. Ошибка:{error}"')
 STATUS_MESSAGE = 'Изменился статус проверки работы "{homework_name}".{verdict}'
+REVIEWER_COMMENT = '\nКомментарий ревьюера: {comment}'
 UNEXPECTED_STATUS = 'Неожиданный статус домашней работы:"{status}"'
 UNEXPECTED_TYPE_LIST_HOMEWORKS = (
     'Ответ API вернул не список по ключу "homeworks", а вернул тип: {type}')
 UNEXPECTED_TYPE_DICT = 'Ответ API вернул не словарь, а вернул тип: {type}'
+UNEXPECTED_TYPE_HOMEWORK = (
+    'Домашняя работа в ответе API не словарь, а тип: {type}')
 UNEXPECTED_API_RESPONSE = (
     'Ответ API не соответствует документации({response}).{error}')
+API_FAILED_STATUS = (
+    'Эндпоинт API {url} недоступен. Код ответа API: {status_code}. '
+    'Параметры: {params}'
+)
 API_FAILED_RESPONSE = (
-    'Эндпоинт API {ENDPOINT} недоступен. Код ответа API: {status_code}. '
-    'Header: {HEADERS}. Kлюч: {key}. Значение ключа: {value}'
+    'Эндпоинт API {url} вернул ошибку. '
+    'Kлюч: {key}. Значение ключа: {value}'
 )
 API_FAILED_REQUEST = (
-    'Ошибка запроса к API:{error}, Эндпоинт API: {ENDPOINT}, '
-    'Header: {HEADERS}, Timestamp: {timestamp}. Ошибка: {error}'
+    'Ошибка запроса к API:{error}, Эндпоинт API: {url}, '
+    'Параметры: {params}'
 )
 NO_KEY = 'Отсутствует ключ {key}'
 NO_KEY_HOMEWORK_NAME = 'Отсутствует ключ домашней работы "homework_name"'
 NO_VARIABLE = 'Отсутствует обязательная переменная окружения {token}'
 ERROR_GLOBAL = 'Ошибка в работе бота: {error}'
+SHARDING_WITHOUT_STATE = 'Для шардирования нужна переменная окружения STATE_DB'
+CONFIG_RELOADED = (
+    'Настройки перечитаны: арендаторов {tenants}, интервал {period}')
+CONFIG_RELOAD_FAILED = 'Не удалось перечитать настройки: {error}'
+STOPPED = 'Бот остановлен'
+RUN_ONCE_WITHOUT_STATE = (
+    'Для разового запуска нужна переменная окружения STATE_DB')
+RUN_ONCE_BUSY = 'Предыдущий запуск ещё работает, опрос пропущен'
+RUN_ONCE_LEASE_LOST = 'Аренда разового запуска потеряна, опрос прерван'
+POLL_QUOTA_EXCEEDED = 'Арендатор {tenant} исчерпал квоту опросов'
+MESSAGE_QUOTA_EXCEEDED = 'Чат {chat_id} исчерпал квоту сообщений'
+INVALID_PRACTICUM_TOKEN = 'токен Практикума отклонён, код ответа {status_code}'
+INVALID_CHAT = 'чат недоступен боту: {error}'
+INVALID_TELEGRAM_TOKEN = 'Токен Telegram отклонён: {error}'
+BOT_CHECK_FAILED = 'Не удалось проверить токен Telegram: {error}'
+TOKENS_CHECKED = (
+    'Проверка арендаторов: действительны {valid}, в карантине {invalid}, '
+    'не удалось проверить {unknown}')
+PROBE_KEY = 'probe'
+QUARANTINED = 'Арендаторы в карантине:\n{tenants}'
+QUARANTINED_TENANT = '{tenant}: {reason}'
+SNAPSHOT_SAVED = 'Снимок состояния сохранён: арендаторов {count}'
+SNAPSHOT_FAILED = 'Не удалось сохранить снимок состояния: {error}'
+UNDELIVERED_ON_STOP = (
+    'При остановке не доставлено сообщений: {count}, они будут '
+    'отправлены после перезапуска')
+
+Runtime = namedtuple('Runtime', (
+    'bot', 'store', 'dedup', 'board', 'live', 'outbox', 'coordinator',
+    'tenants', 'chats', 'windows', 'commands', 'quarantine', 'snapshot'),
+    defaults=(None, None))
 
 logger = logging.getLogger(__name__)
+health = Health(
+    settings.health_busy_timeout, ready_timeout=settings.health_ready_timeout)
+limiter = AdaptiveLimiter(settings.api_concurrency)
+poll_scheduler = FairScheduler()
+poll_quota = Quota(settings.poll_quota)
+message_quota = Quota(settings.message_quota)
+tenant_check = BackgroundCheck(lambda runtime: validate_tenants(runtime))
+latency = LatencyTracker(
+    settings.latency_slo, settings.latency_target,
+    settings.latency_report_period)
 
 
 def check_tokens():
@@ -59,40 +150,115 @@ def check_tokens():
         raise ValueError(NO_VARIABLE.format(token=missed_tokens))
 
 
-def send_message(bot, message):
-    """Отправляет сообщение в Telegram чат."""
+def send_to_chat(bot, chat_id, message):
+    """Отправляет сообщение в указанный чат Telegram.
+
+    Возвращает id отправленного сообщения, если Telegram его вернул, иначе
+    True; при ошибке возвращает False.
+    """
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
+        sent = bot.send_message(chat_id, message)
         logger.debug(SUCCESSFUL_SENT_MESSAGE.format(message=message))
-        return True
+        return getattr(sent, 'message_id', None) or True
     except telegram.TelegramError as error:
         logger.exception(UNSUCCESSFUL_SENT_MESSAGE.format(
             message=message, error=error))
         return False
 
 
-def get_api_answer(timestamp):
-    """Делает запрос к эндпоинту API."""
-    request_params = dict(
-        url=ENDPOINT, headers=HEADERS, params={'from_date': timestamp})
+def edit_message(bot, chat_id, message_id, message):
+    """Заменяет текст ранее отправленного сообщения."""
     try:
-        response = requests.get(**request_params)
+        bot.edit_message_text(message, chat_id=chat_id, message_id=message_id)
+    except telegram.TelegramError as error:
+        if NOT_MODIFIED in str(error).lower():
+            return True
+        logger.warning(UNSUCCESSFUL_EDITED_MESSAGE.format(
+            message_id=message_id, error=error))
+        return False
+    logger.debug(SUCCESSFUL_EDITED_MESSAGE.format(
+        message_id=message_id, message=message))
+    return True
+
+
+def send_message(bot, message):
+    """Отправляет сообщение в Telegram чат."""
+    return send_to_chat(bot, TELEGRAM_CHAT_ID, message)
+
+
+def fetch_api(request_params, stream=False, key=None):
+    """Выполняет запрос к API в пределах адаптивного лимита запросов.
+
+    ``key`` — очередь лимита, по умолчанию своя у каждого токена. Проверки
+    арендаторов идут одной очередью ``PROBE_KEY`` и получают место по
+    кругу наравне с одним арендатором, не тесня опросы.
+    """
+    started = limiter.acquire(
+        request_params['headers'].get('Authorization') if key is None
+        else key)
+    overloaded = True
+    try:
+        response = requests.get(
+            stream=stream, timeout=settings.request_timeout,
+            **request_params)
+        overloaded = (
+            response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+            or response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR)
     except requests.RequestException as error:
         raise ConnectionError(
             API_FAILED_REQUEST.format(error=error, **request_params))
+    finally:
+        limiter.release(started, overloaded)
+    return response
+
+
+def send_api_request(timestamp, stream=False, headers=None):
+    """Отправляет запрос к эндпоинту API и проверяет код ответа."""
+    request_params = dict(
+        url=ENDPOINT, headers=headers or HEADERS,
+        params={'from_date': timestamp})
+    response = fetch_api(request_params, stream)
     if response.status_code != HTTPStatus.OK:
-        raise ValueError(API_FAILED_RESPONSE.format(
+        raise ValueError(API_FAILED_STATUS.format(
             status_code=response.status_code, **request_params)
         )
-    api_response = response.json()
+    return response, request_params
+
+
+def check_api_errors(api_response, request_params):
+    """Проверяет, что в ответе API нет ключей с ошибкой."""
     for key in ['code', 'error']:
         if key in api_response:
             raise ValueError(
                 API_FAILED_RESPONSE.format(
                     key=key, value=api_response.get(key), **request_params))
+
+
+def request_api_answer(timestamp, headers=None):
+    """Запрашивает ответ API с заголовками арендатора."""
+    response, request_params = send_api_request(timestamp, headers=headers)
+    api_response = response.json()
+    if isinstance(api_response, dict):
+        check_api_errors(api_response, request_params)
     return api_response
 
 
+def get_api_answer(timestamp):
+    """Делает запрос к эндпоинту API."""
+    return request_api_answer(timestamp)
+
+
+def check_homework(homework):
+    """Проверяет домашку из ответа API и создаёт по ней запись Homework."""
+    if isinstance(homework, Homework):
+        return homework
+    if not isinstance(homework, dict):
+        raise TypeError(UNEXPECTED_TYPE_HOMEWORK.format(type=type(homework)))
+    if 'homework_name' not in homework:
+        raise KeyError(NO_KEY_HOMEWORK_NAME)
+    return Homework.from_api(homework)
+
+
 def check_response(response):
     """Проверяет ответ API на соответствие документации."""
     if not isinstance(response, dict):
@@ -103,43 +269,790 @@ def check_response(response):
     if not isinstance(homeworks, list):
         raise TypeError(
             UNEXPECTED_TYPE_LIST_HOMEWORKS.format(type=type(homeworks)))
-    return homeworks
+    return [check_homework(homework) for homework in homeworks]
+
+
+def stream_homeworks(stream, response, request_params):
+    """Отдаёт проверенные домашки по одной по мере разбора ответа API."""
+    try:
+        for homework in stream:
+            yield check_homework(homework)
+    finally:
+        response.close()
+    check_api_errors(stream.fields, request_params)
+    if not stream.found:
+        if 'homeworks' not in stream.fields:
+            raise KeyError(NO_KEY.format(key='homeworks'))
+        raise TypeError(UNEXPECTED_TYPE_LIST_HOMEWORKS.format(
+            type=type(stream.fields['homeworks'])))
+
+
+def get_homeworks(timestamp, headers=None):
+    """Возвращает домашки из ответа API и сам ответ.
+
+    В потоковом режиме домашки отдаются генератором, а поля ответа
+    заполняются по мере его разбора.
+    """
+    if not settings.stream_responses:
+        api_answer = request_api_answer(timestamp, headers)
+        return check_response(api_answer), api_answer
+    response, request_params = send_api_request(
+        timestamp, stream=True, headers=headers)
+    stream = ArrayStream(iter_text(response), 'homeworks')
+    return (
+        stream_homeworks(stream, response, request_params), stream.fields)
+
+
+def build_catalog(path):
+    """Создаёт каталог сообщений из встроенных вердиктов и файла."""
+    return MessageCatalog.load(path, {DEFAULT_LOCALE: dict(
+        status=STATUS_MESSAGE, comment=REVIEWER_COMMENT,
+        verdicts=HOMEWORK_VERDICTS)}, DEFAULT_LOCALE)
+
+
+@lru_cache(maxsize=None)
+def load_catalog():
+    """Загружает каталог сообщений один раз за время работы бота."""
+    return build_catalog(settings.message_catalog)
+
+
+def render_status(homework, locale=None):
+    """Возвращает сообщение о статусе домашки в нужной локали."""
+    homework = check_homework(homework)
+    catalog = load_catalog()
+    if not catalog.knows(homework.status, locale):
+        raise ValueError(UNEXPECTED_STATUS.format(status=homework.status))
+    return catalog.render(homework, locale)
 
 
 def parse_status(homework):
     """Возвращает статус домашней работы."""
-    if 'homework_name' not in homework:
-        raise KeyError(NO_KEY_HOMEWORK_NAME)
-    status = homework.get('status')
-    if status not in HOMEWORK_VERDICTS:
-        raise ValueError(UNEXPECTED_STATUS.format(status=status))
-    return STATUS_MESSAGE.format(
-        homework_name=homework.get(
-            'homework_name'), verdict=HOMEWORK_VERDICTS[status])
+    return render_status(homework, settings.message_locale)
+
+
+def open_state_store():
+    """Открывает хранилище состояния, если оно настроено."""
+    return StateStore(settings.state_db) if settings.state_db else None
+
+
+def deliver(bot, chat_id, message):
+    """Отправляет сообщение в чат арендатора.
+
+    Сообщения в основной чат из TELEGRAM_CHAT_ID идут через send_message.
+    """
+    if chat_id == TELEGRAM_CHAT_ID:
+        return send_message(bot, message)
+    return send_to_chat(bot, chat_id, message)
+
+
+def deliver_live(runtime, chat_id, subject, message):
+    """Обновляет сообщение о домашке или, если это невозможно, шлёт новое."""
+    message_id = runtime.live.get(chat_id, subject)
+    if message_id is not None and edit_message(
+            runtime.bot, chat_id, message_id, message):
+        health.record('edit')
+        return True
+    sent = deliver(runtime.bot, chat_id, message)
+    if sent and sent is not True:
+        runtime.live.set(chat_id, subject, sent)
+    return sent
+
+
+def send_notification(runtime, chat_id, subject, message):
+    """Отправляет одно уведомление, при EDIT_MESSAGES — правкой сообщения.
+
+    Пульс здесь не обновляется: отправка может идти из потока очереди,
+    пока основной цикл спит.
+    """
+    if settings.edit_messages and subject != 'error':
+        sent = bool(deliver_live(runtime, chat_id, subject, message))
+    else:
+        sent = bool(deliver(runtime.bot, chat_id, message))
+    health.record('send', sent)
+    return sent
+
+
+def send_batch(runtime, chat_id, entries):
+    """Отправляет пачку уведомлений чата одним или несколькими сообщениями.
+
+    Возвращает, сколько уведомлений с начала пачки доставлено. Части
+    длинного уведомления, доставленные до сбоя, при повторе пропускаются.
+    """
+    if len(entries) == 1 and len(entries[0].text) <= MESSAGE_LIMIT:
+        entry = entries[0]
+        return int(send_notification(runtime, chat_id, entry.key[1],
+                                     entry.text))
+    outbox = runtime.outbox
+    delivered = 0
+    for count, texts in pack([entry.text for entry in entries]):
+        key = entries[delivered].key
+        for text in texts[outbox.parts_sent(key) if len(texts) > 1 else 0:]:
+            sent = bool(deliver(runtime.bot, chat_id, text))
+            health.record('send', sent)
+            if not sent:
+                return delivered
+            if len(texts) > 1:
+                outbox.part_sent(key)
+        delivered += count
+    return delivered
+
+
+def mark_delivered(runtime, tenant, subject, status, version, polled,
+                   enqueued):
+    """Запоминает доставленный переход и учитывает его задержку."""
+    runtime.dedup.remember(tenant.chat_id, subject, status, version)
+    if polled is not None:
+        latency.record(tenant.id, version, polled, enqueued)
+
+
+def notify(runtime, tenant, subject, status, message, version=None,
+           polled=None):
+    """Отправляет сообщение, если этот переход ещё не доставлялся.
+
+    Возвращает None для дубликата, иначе результат отправки. При
+    включённом объединении сообщение ставится в очередь и возвращается True.
+    ``polled`` — время начала опроса, обнаружившего переход.
+    """
+    chat_id = tenant.chat_id
+    if not runtime.dedup.is_new(chat_id, subject, status, version):
+        return None
+    delivered = partial(
+        mark_delivered, runtime, tenant, subject, status, version, polled,
+        time.time())
+    if runtime.outbox is not None:
+        return runtime.outbox.put(Entry(
+            chat_id, (chat_id, subject, status, version), message, version,
+            delivered))
+    if not message_quota.take(chat_id):
+        logger.warning(MESSAGE_QUOTA_EXCEEDED.format(chat_id=chat_id))
+        return False
+    health.beat()
+    if not send_notification(runtime, chat_id, subject, message):
+        return False
+    delivered()
+    return True
+
+
+def report_homework_error(runtime, tenant, error):
+    """Сообщает об ошибке в одной домашке, не прерывая опрос остальных."""
+    message = ERROR_GLOBAL.format(error=error)
+    logger.error(message)
+    notify(runtime, tenant, 'error', status=message, message=message)
+
+
+def backfill_from(runtime, tenant, window, now):
+    """Начало запроса с учётом заполнения доски статусов.
+
+    Пока о домашках чата нет данных, а команды включены, опрос захватывает
+    ещё ``BACKFILL_PERIOD`` секунд истории: доска заполняется тем же
+    запросом, без отдельного запроса всей истории. Если опрос не удался,
+    следующий снова захватит историю.
+    """
+    if runtime.commands is None or not runtime.board.is_empty(
+            tenant.chat_id):
+        return None
+    return min(window.from_date, max(0, int(now) - BACKFILL_PERIOD))
+
+
+def poll_tenant(runtime, tenant, window):
+    """Опрашивает API для арендатора и рассылает новые статусы.
+
+    Домашка, которую не удалось обработать, не мешает остальным и не
+    удерживает курсор: повторный опрос не исправит её статус. Курсор
+    удерживается только недоставленными переходами. Домашки из истории,
+    захваченной для доски статусов, на доску попадают, а уведомлений
+    о них нет.
+    """
+    health.beat()
+    polled = time.time()
+    backfill = backfill_from(runtime, tenant, window, polled)
+    homeworks, api_answer = get_homeworks(
+        window.from_date if backfill is None else backfill, tenant.headers)
+    undelivered = []
+    for homework in homeworks:
+        fresh = backfill is None or (
+            isinstance(homework.date_updated, int)
+            and homework.date_updated >= window.from_date)
+        try:
+            message = render_status(homework, tenant.locale)
+        except ValueError as error:
+            if fresh:
+                report_homework_error(runtime, tenant, error)
+            continue
+        runtime.board.update(tenant.chat_id, homework)
+        if fresh and notify(
+                runtime, tenant, homework.id, homework.status, message,
+                homework.date_updated, polled) is False:
+            undelivered.append(homework.date_updated)
+    if runtime.outbox is not None:
+        undelivered += runtime.outbox.pending_versions(tenant.chat_id)
+    window.advance(api_answer.get('current_date'), undelivered)
+    health.record('poll')
+
+
+def start_sharding(store):
+    """Запускает распределение арендаторов между воркерами."""
+    if not settings.sharding and settings.workers == 1:
+        return None
+    if store is None:
+        logger.critical(SHARDING_WITHOUT_STATE)
+        raise ValueError(SHARDING_WITHOUT_STATE)
+    return ShardCoordinator(
+        store, settings.worker_id if settings.workers == 1 else None,
+        lease_period=settings.shard_lease_period).start()
+
+
+def forget_shards(runtime, shards):
+    """Сбрасывает кеши арендаторов из полученных и отданных шардов.
+
+    Окна опроса, дедупликация, доска статусов и живые сообщения заново
+    читаются из хранилища, куда их мог записать другой воркер.
+    """
+    tenants = [
+        tenant for tenant in list(runtime.tenants)
+        if runtime.coordinator.shard_of(tenant.id) in shards]
+    for tenant in tenants:
+        runtime.windows.pop(tenant.id, None)
+    chat_ids = {tenant.chat_id for tenant in tenants}
+    runtime.dedup.forget(chat_ids)
+    runtime.board.forget(chat_ids)
+    runtime.live.forget(chat_ids)
+
+
+def start_commands(bot, board, chats, store, coordinator):
+    """Запускает приём команд /status и /history, если он включён."""
+    if not settings.bot_commands:
+        return None
+    leader = None
+    if coordinator is not None:
+        def leader():
+            return store.acquire_lease(
+                COMMANDS_LEASE, coordinator.worker_id,
+                settings.shard_lease_period)
+    return CommandPoller(
+        bot, board, send_to_chat, chats, store=store, leader=leader).start()
+
+
+def start_outbox(runtime):
+    """Запускает очередь объединения уведомлений, если она включена."""
+    if not settings.batch_linger:
+        return runtime
+    outbox = Outbox(
+        None, linger=settings.batch_linger, max_batch=settings.batch_size,
+        scheduler=FairScheduler(), quota=message_quota)
+    runtime = runtime._replace(outbox=outbox)
+    outbox.send = partial(send_batch, runtime)
+    outbox.weight = partial(chat_weight, runtime)
+    outbox.start()
+    return runtime
+
+
+def start_health(runtime):
+    """Регистрирует проверки подсистем и запускает HTTP-эндпоинт."""
+    health.register('tenants', lambda: {'count': len(runtime.tenants)})
+    health.register('latency', latency.export)
+    health.register('api_limiter', limiter.stats)
+    health.register('quarantine', lambda: {
+        'count': len(runtime.quarantine)})
+    if runtime.store is not None:
+        health.register('state_store', lambda: {
+            'rows': runtime.store.execute(
+                'SELECT COUNT(*) FROM state')[0][0]})
+    if runtime.coordinator is not None:
+        health.register('sharding', lambda: {
+            'worker': runtime.coordinator.worker_id,
+            'shards': len(runtime.coordinator.owned)})
+    if runtime.outbox is not None:
+        health.register('send_queue', lambda: {
+            'depth': runtime.outbox.depth()})
+    if runtime.commands is not None:
+        health.register('commands', lambda: {
+            'offset': runtime.commands.offset,
+            'running': runtime.commands.thread.is_alive()})
+    if settings.health_port:
+        serve(health, settings.health_port, settings.health_host)
+    if settings.health_watchdog:
+        watchdog(health)
+
+
+def default_tenant():
+    """Возвращает арендатора из переменных окружения."""
+    return Tenant(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, settings.message_locale)
+
+
+def set_tenants(runtime, tenants):
+    """Заменяет список арендаторов и индекс арендаторов по чатам."""
+    runtime.tenants[:] = tenants
+    runtime.chats.clear()
+    runtime.chats.update(
+        (str(tenant.chat_id), tenant) for tenant in tenants)
+
+
+def open_snapshot(coordinator):
+    """Отображает в память снимок состояния рядом с хранилищем.
+
+    При шардировании снимок не ведётся: набор арендаторов воркера меняется
+    вместе с арендами шардов.
+    """
+    if not settings.state_db or coordinator is not None:
+        return None
+    snapshot = Snapshot.open(settings.state_db + SNAPSHOT_SUFFIX)
+    poll_scheduler.restore(snapshot.virtual_time, lambda tenant_id: getattr(
+        snapshot.get(tenant_id), 'finish', None))
+    return snapshot
+
+
+def saved_state(runtime, tenant):
+    """Возвращает запись арендатора из снимка прошлого запуска или None."""
+    if runtime.snapshot is None:
+        return None
+    return runtime.snapshot.get(tenant.id)
+
+
+def save_snapshot(runtime):
+    """Атомарно записывает снимок состояния своих арендаторов.
+
+    Для опрошенных арендаторов берётся текущее состояние, для остальных —
+    запись прошлого снимка. Записи идут в порядке обслуживания.
+    """
+    if runtime.snapshot is None:
+        return
+    records = {}
+    for tenant in runtime.tenants:
+        window = runtime.windows.get(tenant.id)
+        saved = saved_state(runtime, tenant)
+        if window is None:
+            if saved is not None:
+                records[tenant.id] = saved
+            continue
+        saved = saved or Record(None, None, 0.0, 0)
+        flags = saved.flags
+        if tenant.chat_id in runtime.board.local:
+            flags = REVIEWING if runtime.board.has_status(
+                tenant.chat_id, PRIORITY_STATUS) else 0
+        records[tenant.id] = Record(
+            window.cursor, window.polled or saved.polled,
+            poll_scheduler.finish.get(tenant.id, saved.finish), flags)
+    try:
+        write_snapshot(
+            settings.state_db + SNAPSHOT_SUFFIX,
+            sorted(records.items(), key=lambda item: (
+                not item[1].flags & REVIEWING, item[1].finish)),
+            poll_scheduler.virtual_time, time.time())
+    except OSError as error:
+        logger.error(SNAPSHOT_FAILED.format(error=error))
+        return
+    logger.debug(SNAPSHOT_SAVED.format(count=len(records)))
+
+
+def start_runtime(bot, once=False):
+    """Открывает хранилище и запускает подсистемы воркера.
+
+    При ``once`` не запускаются шардирование, приём команд и проверки
+    здоровья: разовый запуск не живёт дольше одного опроса. Снимок
+    состояния прошлого запуска отображается в память без чтения.
+    """
+    store = open_state_store()
+    coordinator = None if once else start_sharding(store)
+    board = StatusBoard(render_status, store=store)
+    chats = {}
+    commands = None
+    if not once:
+        commands = start_commands(bot, board, chats, store, coordinator)
+    dedup = DedupIndex(settings.dedup_ttl, settings.dedup_size, store=store)
+    runtime = Runtime(
+        bot, store, dedup, board, LiveMessages(store), None, coordinator, [],
+        chats, {}, commands, Quarantine(store), open_snapshot(coordinator))
+    runtime = start_outbox(runtime)
+    set_tenants(
+        runtime, load_tenants(settings.tenants_file, default_tenant()))
+    if coordinator is not None:
+        coordinator.on_change = partial(forget_shards, runtime)
+    if not once:
+        start_health(runtime)
+    return runtime
+
+
+def reload_config(runtime):
+    """Перечитывает .env, арендаторов, интервал опроса и каталог сообщений.
+
+    Арендатор по умолчанию собирается из только что прочитанных токена
+    Практикума, чата и локали. При ошибке остаются прежние настройки.
+    """
+    global settings, PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, HEADERS
+    load_dotenv(override=True)
+    practicum_token = os.getenv('PRACTICUM_TOKEN')
+    chat_id = os.getenv('TELEGRAM_CHAT_ID')
+    try:
+        loaded = Settings.from_env()
+        build_catalog(loaded.message_catalog)
+        tenants = load_tenants(loaded.tenants_file, Tenant(
+            practicum_token, chat_id, loaded.message_locale))
+    except Exception as error:
+        logger.exception(CONFIG_RELOAD_FAILED.format(error=error))
+        return
+    settings = settings._replace(**{
+        name: getattr(loaded, name) for name in RELOADABLE})
+    PRACTICUM_TOKEN, TELEGRAM_CHAT_ID = practicum_token, chat_id
+    HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+    load_catalog.cache_clear()
+    set_tenants(runtime, tenants)
+    logger.info(CONFIG_RELOADED.format(
+        tenants=len(tenants), period=settings.retry_period))
+
+
+def chat_weight(runtime, chat_id):
+    """Возвращает вес арендатора чата для справедливой очереди отправки."""
+    tenant = runtime.chats.get(str(chat_id))
+    return 1 if tenant is None else tenant.weight
+
+
+def poll_priority(runtime, tenant):
+    """Класс приоритета опроса: сначала арендаторы с работой на проверке.
+
+    Пока арендатор не опрошен, статус берётся из снимка, а не из хранилища.
+    """
+    saved = saved_state(runtime, tenant)
+    if saved is not None and tenant.chat_id not in runtime.board.local:
+        return 0 if saved.flags & REVIEWING else 1
+    if runtime.board is not None and runtime.board.has_status(
+            tenant.chat_id, PRIORITY_STATUS):
+        return 0
+    return 1
+
+
+def within_poll_quota(tenant):
+    """Списывает опрос с квоты арендатора, если она не исчерпана."""
+    if poll_quota.take(tenant.id):
+        return True
+    logger.warning(POLL_QUOTA_EXCEEDED.format(tenant=tenant.id))
+    return False
+
+
+def poll_owned(runtime, tenant, stopping):
+    """Опрашивает арендатора и сообщает ему об ошибке опроса.
+
+    Владение арендатором перепроверяется перед самым опросом: за время
+    цикла шард мог перейти к другому воркеру. Окно читается один раз,
+    поэтому сброс кешей из потока аренд не прерывает начатый опрос.
+    Время опроса, в том числе неудачного, списывается с арендатора в
+    справедливой очереди опросов.
+    """
+    coordinator = runtime.coordinator
+    if stopping.is_set() or (
+            coordinator is not None and not coordinator.owns(tenant.id)):
+        return
+    started = time.monotonic()
+    try:
+        window = runtime.windows.get(tenant.id)
+        if window is None:
+            saved = saved_state(runtime, tenant)
+            window = runtime.windows[tenant.id] = PollWindow(
+                tenant.id, settings.window_overlap, store=runtime.store,
+                cursor=saved and saved.cursor)
+        poll_tenant(runtime, tenant, window)
+    except Exception as error:
+        health.record('poll', ok=False)
+        message = ERROR_GLOBAL.format(error=error)
+        logging.exception(message)
+        notify(runtime, tenant, 'error', status=message, message=message)
+    finally:
+        poll_scheduler.charge(
+            tenant.id, time.monotonic() - started, tenant.weight)
+
+
+def poll_tenants(runtime, stopping, tenants=None):
+    """Опрашивает своих арендаторов, пока не пришла команда остановки.
+
+    Арендаторы идут в порядке справедливой очереди: сперва те, у кого
+    работа на проверке, затем потратившие меньше времени опросов с учётом
+    веса. Исчерпавшие квоту опросов пропускаются. При API_CONCURRENCY
+    больше 1 арендаторы опрашиваются параллельно, а число одновременных
+    запросов к API подбирает ``limiter``.
+    """
+    coordinator = runtime.coordinator
+    quarantine = runtime.quarantine or ()
+    owned = poll_scheduler.order(
+        (tenant for tenant in (runtime.tenants if tenants is None else tenants)
+         if (coordinator is None or coordinator.owns(tenant.id))
+         and tenant.id not in quarantine and within_poll_quota(tenant)),
+        key=attrgetter('id'), priority=partial(poll_priority, runtime))
+    if settings.api_concurrency <= 1 or len(owned) < 2:
+        for tenant in owned:
+            poll_owned(runtime, tenant, stopping)
+        return
+    with ThreadPoolExecutor(
+            settings.api_concurrency, thread_name_prefix='poll') as pool:
+        for tenant in owned:
+            pool.submit(poll_owned, runtime, tenant, stopping)
+
+
+def probe_tenant(bot, tenant):
+    """Проверяет токен Практикума и доступность чата арендатора."""
+    request_params = dict(
+        url=ENDPOINT, headers=tenant.headers,
+        params={'from_date': int(time.time())})
+    response = fetch_api(request_params, key=PROBE_KEY)
+    if response.status_code in INVALID_TOKEN_STATUSES:
+        raise InvalidCredentials(INVALID_PRACTICUM_TOKEN.format(
+            status_code=response.status_code))
+    if response.status_code != HTTPStatus.OK:
+        raise ValueError(API_FAILED_STATUS.format(
+            status_code=response.status_code, **request_params))
+    try:
+        bot.get_chat(tenant.chat_id)
+    except (telegram.error.BadRequest, telegram.error.Unauthorized) as error:
+        raise InvalidCredentials(INVALID_CHAT.format(error=error))
+
+
+def check_bot(bot):
+    """Проверяет токен Telegram: с отклонённым токеном бот не работает."""
+    try:
+        bot.get_me()
+    except telegram.error.Unauthorized as error:
+        logger.critical(INVALID_TELEGRAM_TOKEN.format(error=error))
+        raise ValueError(INVALID_TELEGRAM_TOKEN.format(error=error))
+    except Exception as error:
+        logger.warning(BOT_CHECK_FAILED.format(error=error))
+
+
+def update_quarantine(runtime, valid, invalid):
+    """Обновляет карантин по итогам проверки.
+
+    Исправленные арендаторы выходят из карантина, непроверенные остаются
+    как были. Возвращает {id: причина} новых арендаторов в карантине.
+    """
+    quarantine = runtime.quarantine
+    added = {
+        tenant_id: reason for tenant_id, reason in invalid.items()
+        if tenant_id not in quarantine}
+    for tenant_id in valid:
+        quarantine.discard(tenant_id)
+    for tenant_id, reason in invalid.items():
+        quarantine.add(tenant_id, reason)
+    return added
+
+
+def report_quarantined(runtime, added):
+    """Присылает в основной чат одну сводку о новых арендаторах в карантине."""
+    if not added:
+        return
+    summary = QUARANTINED.format(tenants='\n'.join(
+        QUARANTINED_TENANT.format(tenant=tenant_id, reason=reason)
+        for tenant_id, reason in added.items()))
+    logger.warning(summary)
+    send_message(runtime.bot, summary)
+
+
+def validate_tenants(runtime):
+    """Параллельно проверяет данные своих арендаторов и обновляет карантин.
+
+    Недействительные попадают в карантин и не опрашиваются. О новых
+    арендаторах в карантине в основной чат приходит одна сводка.
+    """
+    check_bot(runtime.bot)
+    coordinator = runtime.coordinator
+    valid, invalid, unknown = validate(
+        [tenant for tenant in runtime.tenants
+         if coordinator is None or coordinator.owns(tenant.id)],
+        partial(probe_tenant, runtime.bot), settings.token_check_workers)
+    added = update_quarantine(runtime, valid, invalid)
+    runtime.quarantine.mark_checked()
+    logger.info(TOKENS_CHECKED.format(
+        valid=len(valid), invalid=len(invalid), unknown=len(unknown)))
+    report_quarantined(runtime, added)
+
+
+def start_tenant_check(runtime, force=False):
+    """Проверяет арендаторов в фоне при запуске, перезагрузке и раз в период.
+
+    Опрос не ждёт проверки: пока она идёт, пропускаются только арендаторы,
+    уже сидящие в карантине.
+    """
+    if settings.token_check and (force or not tenant_check.running and (
+            runtime.quarantine.due(settings.token_check_period))):
+        tenant_check.request(runtime)
+
+
+def report_latency():
+    """Пишет в журнал отчёт SLO задержки уведомлений по арендаторам."""
+    for line in latency.describe(latency.report()):
+        logger.info(line)
+
+
+def shutdown(runtime, leases=None, timeout=None):
+    """Освобождает аренды, останавливает подсистемы и закрывает хранилище.
+
+    ``leases`` — дополнительные аренды {имя: владелец}, которые
+    освобождаются после отправки очереди. ``timeout`` — сколько секунд
+    есть на досылку очереди, по умолчанию SHUTDOWN_TIMEOUT. Перед
+    закрытием хранилища сохраняется снимок состояния.
+    """
+    if runtime.commands is not None:
+        runtime.commands.stop()
+    if runtime.outbox is not None:
+        left = runtime.outbox.stop(
+            settings.shutdown_timeout if timeout is None else timeout)
+        if left:
+            logger.error(UNDELIVERED_ON_STOP.format(count=left))
+    if runtime.coordinator is not None:
+        runtime.coordinator.stop()
+        runtime.store.release_lease(
+            COMMANDS_LEASE, runtime.coordinator.worker_id)
+    if runtime.snapshot is not None:
+        save_snapshot(runtime)
+        runtime.snapshot.close()
+    if runtime.store is not None:
+        for name, owner in (leases or {}).items():
+            runtime.store.release_lease(name, owner)
+        runtime.store.close()
+    logger.info(STOPPED)
 
 
 def main():
     """Основная логика работы бота."""
     check_tokens()
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
-    previous_message = ''
-    message = ''
-    while True:
+    runtime = start_runtime(bot)
+    if settings.token_check:
+        check_bot(bot)
+    start_tenant_check(runtime, force=True)
+    lifecycle = Lifecycle(settings.shutdown_timeout)
+    saved = time.monotonic()
+    with lifecycle.handle_signals():
+        while not lifecycle.stopping.is_set():
+            if lifecycle.reloading.is_set():
+                lifecycle.reloading.clear()
+                reload_config(runtime)
+                start_tenant_check(runtime, force=True)
+            start_tenant_check(runtime)
+            poll_tenants(runtime, lifecycle.stopping)
+            if latency.due():
+                report_latency()
+            if settings.snapshot_period and (
+                    time.monotonic() - saved >= settings.snapshot_period):
+                save_snapshot(runtime)
+                saved = time.monotonic()
+            if lifecycle.pending():
+                continue
+            period = settings.retry_period
+            health.idle(period)
+            with lifecycle.interruptible():
+                if not lifecycle.pending():
+                    time.sleep(period)
+        shutdown(runtime, timeout=lifecycle.remaining())
+
+
+def due_tenants(runtime, now=None):
+    """Перебирает арендаторов, не опрошенных дольше RETRY_PERIOD.
+
+    Небольшой запас ``DUE_SLACK`` гасит дрожание расписания, чтобы
+    запуск раз в RETRY_PERIOD не пропускал каждый второй опрос. Время
+    опроса берётся из снимка, а хранилище читается только для арендаторов
+    без него, поэтому первый опрос начинается, не дожидаясь проверки всех.
+    """
+    now = time.time() if now is None else now
+    for tenant in runtime.tenants:
+        saved = saved_state(runtime, tenant)
+        polled = saved and saved.polled or runtime.store.get(
+            POLLED_NAMESPACE, tenant.id, 0)
+        if now - polled >= settings.retry_period * (1 - DUE_SLACK):
+            yield tenant
+
+
+def poll_due_tenants(runtime, stopping, owner):
+    """Опрашивает арендаторов, чей срок подошёл, продлевая аренду запуска.
+
+    Если подошёл срок проверки арендаторов, каждый проверяется прямо перед
+    своим опросом, а не все до первого: время до первого опроса не
+    зависит от их числа. Срок проверки сдвигается, только если пройдены
+    все арендаторы, чей срок опроса подошёл.
+    """
+    store = runtime.store
+    checking = settings.token_check and runtime.quarantine.due(
+        settings.token_check_period)
+    if checking:
+        check_bot(runtime.bot)
+    added = {}
+    for tenant in due_tenants(runtime):
+        if stopping.is_set():
+            break
+        if not store.acquire_lease(
+                RUN_ONCE_LEASE, owner, settings.run_once_lease_period):
+            logger.error(RUN_ONCE_LEASE_LOST)
+            break
+        if checking:
+            added.update(update_quarantine(runtime, *validate(
+                [tenant], partial(probe_tenant, runtime.bot), 1)[:2]))
+        poll_tenants(runtime, stopping, [tenant])
+        store.set(POLLED_NAMESPACE, tenant.id, time.time())
+    else:
+        if checking:
+            runtime.quarantine.mark_checked()
+    report_quarantined(runtime, added)
+
+
+def answer_commands(runtime):
+    """Отвечает на накопившиеся команды без ожидания новых."""
+    CommandPoller(
+        runtime.bot, runtime.board, send_to_chat, runtime.chats,
+        store=runtime.store, timeout=0).poll()
+
+
+def run_once():
+    """Один цикл опроса для запуска по расписанию (cron, serverless).
+
+    Опрашивает арендаторов, чей срок подошёл, досылает очередь, сохраняет
+    состояние и завершается. Пересекающиеся запуски исключает аренда в
+    хранилище: она продлевается перед каждым арендатором, а запуск,
+    не получивший её, ничего не делает. Возвращает False, если опрос
+    пропущен.
+    """
+    check_tokens()
+    if not settings.state_db:
+        logger.critical(RUN_ONCE_WITHOUT_STATE)
+        raise ValueError(RUN_ONCE_WITHOUT_STATE)
+    bot = telegram.Bot(token=TELEGRAM_TOKEN)
+    runtime = start_runtime(bot, once=True)
+    store = runtime.store
+    owner = default_worker_id()
+    if not store.acquire_lease(
+            RUN_ONCE_LEASE, owner, settings.run_once_lease_period):
+        logger.info(RUN_ONCE_BUSY)
+        shutdown(runtime)
+        return False
+    lifecycle = Lifecycle(settings.shutdown_timeout)
+    with lifecycle.handle_signals():
         try:
-            api_answer = get_api_answer(timestamp)
-            homeworks = check_response(api_answer)
-            if homeworks:
-                message = parse_status(homeworks[0])
-            if previous_message != message and send_message(bot, message):
-                previous_message = message
-                timestamp = api_answer.get('current_date', timestamp)
-        except Exception as error:
-            message = ERROR_GLOBAL.format(error=error)
-            logging.exception(ERROR_GLOBAL.format(error=error))
-            if message != previous_message and send_message(bot, message):
-                previous_message = message
-        time.sleep(RETRY_PERIOD)
+            poll_due_tenants(runtime, lifecycle.stopping, owner)
+            if settings.bot_commands and not lifecycle.stopping.is_set():
+                answer_commands(runtime)
+        finally:
+            shutdown(runtime, leases={RUN_ONCE_LEASE: owner},
+                     timeout=lifecycle.remaining())
+            report_latency()
+    return True
+
+
+def run_worker(number):
+    """Запускает воркер со своим портом проверок здоровья."""
+    global settings
+    if settings.health_port:
+        settings = settings._replace(
+            health_port=settings.health_port + number)
+    main()
+
+
+def run_workers(count):
+    """Запускает несколько процессов-воркеров с общим хранилищем."""
+    workers = [
+        multiprocessing.Process(
+            target=run_worker, args=(number,), name=f'worker-{number}')
+        for number in range(count)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
 
 
 if __name__ == '__main__':
@@ -150,7 +1063,12 @@ if __name__ == '__main__':
             handlers=[
                 logging.StreamHandler(sys.stdout),
                 logging.FileHandler(__file__ + '.log', mode='w')])
-        main()
+        if settings.run_once or '--once' in sys.argv[1:]:
+            run_once()
+        elif settings.workers > 1:
+            run_workers(settings.workers)
+        else:
+            main()
     except KeyboardInterrupt as error:
         logger.exception(f'Программа была остановлена:{error}')
     # for testing
@@ -0,0 +1,152 @@
+import threading
+import time
+from bisect import bisect_left
+
+BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 21600)
+STAGES = ('discovery', 'queue', 'total')
+SLO = 900
+TARGET = 0.95
+REPORT_PERIOD = 3600
+QUANTILES = (0.5, 0.95, 0.99)
+
+SLO_REPORT = (
+    'Задержка уведомлений арендатора {tenant}: {count} шт., '
+    'p50 {p50} с, p95 {p95} с, p99 {p99} с, в пределах {slo} с: '
+    '{ratio:.1%} при цели {target:.1%}')
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин в секундах.
+
+    Хранит только счётчики, поэтому размер не зависит от числа замеров.
+    Квантили оцениваются верхней границей корзины.
+    """
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds=BUCKETS):
+        """``bounds`` — возрастающие верхние границы корзин."""
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Учитывает замер в его корзине."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Оценивает квантиль ``q``; None, пока замеров нет."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def share_within(self, limit):
+        """Доля замеров не больше ``limit`` по границам корзин."""
+        if not self.count:
+            return None
+        index = bisect_left(self.bounds, limit)
+        if index == len(self.bounds) or self.bounds[index] != limit:
+            index -= 1
+        return sum(self.counts[:index + 1]) / self.count
+
+    def export(self):
+        """Накопительные счётчики по границам, как в Prometheus."""
+        buckets = {}
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            buckets[str(bound)] = seen
+        buckets['+Inf'] = self.count
+        return {'buckets': buckets, 'sum': round(self.sum, 3),
+                'count': self.count}
+
+
+class LatencyTracker:
+    """Задержка от смены статуса ревьюером до доставки в Telegram.
+
+    По каждому доставленному переходу учитываются ``date_updated`` из API,
+    начало опроса, который его обнаружил, постановка в отправку и
+    доставка. Из них считаются этапы: обнаружение (опрос − изменение),
+    очередь (доставка − постановка) и полная задержка. Гистограммы этапов
+    накапливаются за всё время работы, гистограммы полной задержки по
+    арендаторам — за период отчёта SLO (``period`` секунд) и сбрасываются
+    после него.
+    """
+
+    def __init__(self, slo=SLO, target=TARGET, period=REPORT_PERIOD,
+                 bounds=BUCKETS, clock=time.time):
+        """``slo`` — порог задержки в секундах, ``target`` — доля."""
+        self.slo = slo
+        self.target = target
+        self.period = period
+        self.bounds = bounds
+        self.clock = clock
+        self.reported = clock()
+        self.stages = {stage: Histogram(bounds) for stage in STAGES}
+        self.tenants = {}
+        self.lock = threading.Lock()
+
+    def record(self, tenant_id, updated, polled, enqueued, delivered=None):
+        """Учитывает доставленный переход; время — unix-секунды."""
+        if not isinstance(updated, (int, float)):
+            return
+        delivered = self.clock() if delivered is None else delivered
+        stages = {
+            'discovery': polled - updated,
+            'queue': delivered - enqueued,
+            'total': delivered - updated,
+        }
+        with self.lock:
+            for stage, value in stages.items():
+                self.stages[stage].observe(max(0, value))
+            tenant = self.tenants.get(tenant_id)
+            if tenant is None:
+                tenant = self.tenants[tenant_id] = Histogram(self.bounds)
+            tenant.observe(max(0, stages['total']))
+
+    def export(self):
+        """Возвращает гистограммы этапов для проверок здоровья."""
+        with self.lock:
+            return {
+                stage: histogram.export()
+                for stage, histogram in self.stages.items()}
+
+    def due(self):
+        """Проверяет, пора ли писать отчёт SLO."""
+        return self.clock() - self.reported >= self.period
+
+    def report(self, reset=True):
+        """Сводка SLO по арендаторам за период с прошлого отчёта."""
+        with self.lock:
+            tenants = self.tenants
+            if reset:
+                self.tenants = {}
+                self.reported = self.clock()
+        report = {}
+        for tenant_id, histogram in tenants.items():
+            ratio = histogram.share_within(self.slo)
+            report[tenant_id] = {
+                'count': histogram.count,
+                **{f'p{round(q * 100)}': histogram.quantile(q)
+                   for q in QUANTILES},
+                'within_slo': ratio,
+                'met': ratio >= self.target,
+            }
+        return report
+
+    def describe(self, report):
+        """Строки отчёта SLO для журнала."""
+        return [
+            SLO_REPORT.format(
+                tenant=tenant_id, ratio=summary['within_slo'], slo=self.slo,
+                target=self.target, **summary)
+            for tenant_id, summary in report.items()]
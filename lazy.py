@@ -0,0 +1,36 @@
+import importlib
+
+
+class LazyModule:
+    """Модуль, который импортируется при первом обращении к атрибуту.
+
+    Тяжёлые зависимости не замедляют импорт бота и короткие запуски, где
+    они не нужны. Атрибуты читаются и записываются в настоящем модуле,
+    поэтому подмена, например, ``telegram.Bot`` в тестах видна и через
+    обёртку.
+    """
+
+    __slots__ = ('_name',)
+
+    def __init__(self, name):
+        """Запоминает имя модуля, не импортируя его."""
+        object.__setattr__(self, '_name', name)
+
+    def _load(self):
+        return importlib.import_module(self._name)
+
+    def __getattr__(self, attr):
+        """Импортирует модуль и читает его атрибут."""
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        """Импортирует модуль и меняет его атрибут."""
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr):
+        """Импортирует модуль и удаляет его атрибут."""
+        delattr(self._load(), attr)
+
+    def __repr__(self):
+        """Показывает имя модуля, не импортируя его."""
+        return f'LazyModule({self._name!r})'
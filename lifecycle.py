@@ -0,0 +1,106 @@
+import logging
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+SHUTDOWN_TIMEOUT = 25
+
+STOP_REQUESTED = 'Получен сигнал {signal}, бот завершает работу'
+RELOAD_REQUESTED = 'Получен сигнал {signal}, настройки будут перечитаны'
+SHUTDOWN_EXPIRED = 'Бот не завершился за {timeout} с, процесс остановлен'
+
+logger = logging.getLogger(__name__)
+
+
+class Interrupted(Exception):
+    """Сон основного цикла прерван сигналом."""
+
+
+class Lifecycle:
+    """Остановка по SIGTERM/SIGINT и перезагрузка настроек по SIGHUP.
+
+    Сигнал выставляет флаг и прерывает только сон цикла: начатые опросы и
+    отправки дорабатываются. Если остановка не уложилась в ``timeout``
+    секунд, процесс завершается принудительно; ``remaining`` отдаёт время,
+    оставшееся до этого срока, чтобы остановка в него уложилась.
+    """
+
+    def __init__(self, timeout=SHUTDOWN_TIMEOUT):
+        """``timeout`` — секунд на остановку до принудительного выхода."""
+        self.timeout = timeout
+        self.stopping = threading.Event()
+        self.reloading = threading.Event()
+        self.sleeping = False
+        self.deadline = None
+        self.stop_by = None
+
+    def on_stop(self, signum, frame):
+        """Просит цикл остановиться и взводит таймер выхода."""
+        logger.warning(
+            STOP_REQUESTED.format(signal=signal.Signals(signum).name))
+        if not self.stopping.is_set():
+            self.stopping.set()
+            self.stop_by = time.monotonic() + self.timeout
+            self.deadline = threading.Timer(self.timeout, self.force_exit)
+            self.deadline.daemon = True
+            self.deadline.start()
+        if self.sleeping:
+            raise Interrupted
+
+    def on_reload(self, signum, frame):
+        """Просит цикл перечитать настройки."""
+        logger.info(
+            RELOAD_REQUESTED.format(signal=signal.Signals(signum).name))
+        self.reloading.set()
+        if self.sleeping:
+            raise Interrupted
+
+    def force_exit(self):
+        """Завершает процесс, не дождавшись остановки цикла."""
+        logger.critical(SHUTDOWN_EXPIRED.format(timeout=self.timeout))
+        logging.shutdown()
+        os._exit(1)
+
+    @contextmanager
+    def handle_signals(self):
+        """Устанавливает обработчики сигналов на время работы цикла."""
+        handlers = {signal.SIGTERM: self.on_stop, signal.SIGINT: self.on_stop}
+        if hasattr(signal, 'SIGHUP'):
+            handlers[signal.SIGHUP] = self.on_reload
+        previous = {
+            signum: signal.signal(signum, handler)
+            for signum, handler in handlers.items()}
+        try:
+            yield self
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+            if self.deadline is not None:
+                self.deadline.cancel()
+
+    def remaining(self):
+        """Сколько секунд осталось до принудительного завершения."""
+        if self.stop_by is None:
+            return self.timeout
+        return max(0, self.stop_by - time.monotonic())
+
+    def pending(self):
+        """Проверяет, ждут ли обработки остановка или перезагрузка."""
+        return self.stopping.is_set() or self.reloading.is_set()
+
+    @contextmanager
+    def interruptible(self):
+        """Позволяет сигналу прервать сон внутри блока.
+
+        Сигнал, пришедший до входа в блок, только выставляет флаг, поэтому
+        внутри блока перед сном нужно снова проверить ``pending``.
+        """
+        self.sleeping = True
+        try:
+            yield
+        except Interrupted:
+            pass
+        finally:
+            self.sleeping = False
@@ -0,0 +1,108 @@
+import statistics
+import threading
+import time
+from collections import OrderedDict, deque
+
+MIN_LIMIT = 1
+MAX_LIMIT = 16
+BACKOFF = 0.5
+TOLERANCE = 2.0
+COOLDOWN = 1.0
+SMOOTHING = 0.05
+WINDOW = 10
+
+
+class AdaptiveLimiter:
+    """Адаптивный лимит одновременных запросов к API по схеме AIMD.
+
+    Пока запросы проходят быстро и без ошибок, лимит растёт на
+    ``1 / limit`` за каждый ответ, то есть примерно на единицу за «окно»
+    из ``limit`` запросов. На перегрузку — 429, 5xx, ошибку соединения или
+    рост медианы последних ``window`` задержек выше ``tolerance``
+    сглаженной — лимит умножается на ``backoff``, не чаще раза в
+    ``cooldown`` секунд, чтобы пачка одновременных отказов не обрушила
+    его до минимума. Сглаженная задержка учитывает каждый ответ, поэтому
+    одиночный тяжёлый запрос лимит не режет, а после устойчивого сдвига
+    задержки она догоняет новый уровень и лимит снова растёт. Запросы
+    сверх лимита ждут в очередях по ключам (арендаторам) и допускаются
+    по кругу.
+    """
+
+    def __init__(self, max_limit=MAX_LIMIT, min_limit=MIN_LIMIT,
+                 initial=None, backoff=BACKOFF, tolerance=TOLERANCE,
+                 cooldown=COOLDOWN, smoothing=SMOOTHING, window=WINDOW,
+                 clock=time.monotonic):
+        """``initial`` — стартовый лимит, по умолчанию минимальный."""
+        self.max_limit = max(max_limit, min_limit)
+        self.min_limit = min_limit
+        self.limit = float(min(max(initial or min_limit, min_limit),
+                               self.max_limit))
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+        self.clock = clock
+        self.baseline = None
+        self.recent = deque(maxlen=window)
+        self.last_decrease = None
+        self.in_flight = 0
+        self.queues = OrderedDict()
+        self.condition = threading.Condition()
+
+    def capacity(self):
+        """Сколько запросов допускается одновременно."""
+        return max(self.min_limit, int(self.limit))
+
+    def acquire(self, key=None):
+        """Ждёт свободного места и возвращает время начала запроса."""
+        ticket = object()
+        with self.condition:
+            self.queues.setdefault(key, deque()).append(ticket)
+            try:
+                while not (self.in_flight < self.capacity()
+                           and next(iter(self.queues.values()))[0] is ticket):
+                    self.condition.wait()
+            finally:
+                queue = self.queues.pop(key)
+                queue.remove(ticket)
+                if queue:
+                    self.queues[key] = queue
+                self.condition.notify_all()
+            self.in_flight += 1
+        return self.clock()
+
+    def release(self, started, overloaded=False):
+        """Учитывает исход запроса и освобождает место."""
+        now = self.clock()
+        latency = now - started
+        with self.condition:
+            saturated = self.in_flight >= self.capacity()
+            self.in_flight -= 1
+            self.recent.append(latency)
+            spike = (self.baseline is not None
+                     and len(self.recent) == self.recent.maxlen
+                     and statistics.median(self.recent)
+                     > self.tolerance * self.baseline)
+            self.baseline = latency if self.baseline is None else (
+                self.baseline + self.smoothing * (latency - self.baseline))
+            if overloaded or spike:
+                if (self.last_decrease is None
+                        or now - self.last_decrease >= self.cooldown):
+                    self.limit = max(
+                        self.min_limit, self.limit * self.backoff)
+                    self.last_decrease = now
+            elif saturated:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    def stats(self):
+        """Возвращает лимит, число запросов и очередь для отчёта."""
+        with self.condition:
+            return {
+                'limit': round(self.limit, 2),
+                'in_flight': self.in_flight,
+                'queued': sum(len(queue) for queue in self.queues.values()),
+                'baseline': (
+                    None if self.baseline is None
+                    else round(self.baseline, 3)),
+            }
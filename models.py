@@ -0,0 +1,67 @@
+import sys
+from datetime import datetime, timezone
+
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def parse_date(value):
+    """Переводит дату из ответа API в unix-время."""
+    if not isinstance(value, str):
+        return value
+    try:
+        return int(datetime.strptime(value, DATE_FORMAT).replace(
+            tzinfo=timezone.utc).timestamp())
+    except ValueError:
+        return value
+
+
+def intern(value):
+    """Интернирует строку, остальные значения возвращает как есть."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Homework:
+    """Компактная запись о домашней работе из ответа API.
+
+    Хранит только используемые ботом поля: статус интернируется, поэтому
+    тысячи записей с одинаковым статусом ссылаются на одну строку, а дата
+    обновления хранится числом unix-времени.
+    """
+
+    __slots__ = ('id', 'name', 'status', 'date_updated', 'reviewer_comment')
+
+    def __init__(self, id, name, status, date_updated=None,
+                 reviewer_comment=None):
+        """Создаёт запись; строковый статус интернируется."""
+        self.id = id
+        self.name = name
+        self.status = intern(status)
+        self.date_updated = date_updated
+        self.reviewer_comment = reviewer_comment or None
+
+    @classmethod
+    def from_api(cls, data):
+        """Создаёт запись из словаря домашки в ответе API."""
+        return cls(
+            data.get('id'), data['homework_name'], data.get('status'),
+            parse_date(data.get('date_updated')), data.get('reviewer_comment'))
+
+    def astuple(self):
+        """Возвращает поля записи кортежем для сохранения."""
+        return (self.id, self.name, self.status, self.date_updated,
+                self.reviewer_comment)
+
+    def __eq__(self, other):
+        """Сравнивает записи по всем полям."""
+        if not isinstance(other, Homework):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+
+    def __hash__(self):
+        """Хеширует запись по всем полям."""
+        return hash(self.astuple())
+
+    def __repr__(self):
+        """Показывает id, имя и статус домашки."""
+        return (f'Homework(id={self.id!r}, name={self.name!r}, '
+                f'status={self.status!r})')
@@ -0,0 +1,103 @@
+import threading
+import time
+
+QUOTA_PERIOD = 3600
+
+
+class FairScheduler:
+    """Взвешенная справедливая очередь арендаторов (start-time fair queuing).
+
+    У каждого ключа есть метка окончания обслуживания: после обслуживания
+    она растёт на ``cost / weight``, где стоимость — время опроса или
+    число отправленных сообщений. Первыми идут ключи с меньшей меткой
+    начала, поэтому шумный арендатор, потративший много времени или
+    сообщений, отодвигается в конец, но не выпадает совсем. Метка
+    начала не меньше текущего виртуального времени, так что простаивавший
+    арендатор не копит кредит на будущее.
+
+    ``restore`` подхватывает метки из снимка прошлого запуска: метка ключа
+    читается из ``saved`` при первом обращении к нему, а не вся сразу.
+    """
+
+    def __init__(self):
+        """Создаёт пустую очередь с нулевым виртуальным временем."""
+        self.virtual_time = 0.0
+        self.finish = {}
+        self.saved = None
+        self.lock = threading.Lock()
+
+    def restore(self, virtual_time, saved):
+        """Продолжает очередь с виртуального времени прошлого запуска.
+
+        ``saved`` возвращает сохранённую метку окончания ключа или None.
+        """
+        with self.lock:
+            self.virtual_time = max(self.virtual_time, virtual_time)
+            self.saved = saved
+
+    def finished(self, key):
+        """Метка окончания ключа; без неё — из снимка или 0."""
+        finish = self.finish.get(key)
+        if finish is None:
+            finish = self.finish[key] = (
+                self.saved is not None and self.saved(key) or 0.0)
+        return finish
+
+    def tag(self, key):
+        """Возвращает метку начала обслуживания ключа."""
+        with self.lock:
+            return max(self.virtual_time, self.finished(key))
+
+    def order(self, items, key=lambda item: item, priority=None):
+        """Сортирует по классу приоритета, затем по метке начала."""
+        return sorted(items, key=lambda item: (
+            0 if priority is None else priority(item), self.tag(key(item))))
+
+    def charge(self, key, cost, weight=1):
+        """Учитывает обслуживание ключа стоимостью ``cost``."""
+        with self.lock:
+            start = max(self.virtual_time, self.finished(key))
+            self.virtual_time = start
+            self.finish[key] = start + cost / (weight or 1)
+
+
+class Quota:
+    """Квота событий на ключ: не больше ``limit`` за ``period`` секунд.
+
+    Токен-бакет: квота восстанавливается равномерно, а не разом в начале
+    часа, так что исчерпавший её арендатор получает события по одному
+    по мере восстановления. ``limit`` 0 — без ограничений.
+    """
+
+    def __init__(self, limit=0, period=QUOTA_PERIOD, clock=time.monotonic):
+        """``limit`` событий за ``period`` секунд; 0 — без квоты."""
+        self.limit = limit
+        self.period = period
+        self.clock = clock
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def refill(self, key, now):
+        """Возвращает остаток квоты ключа на момент ``now``."""
+        tokens, updated = self.buckets.get(key, (self.limit, now))
+        return min(self.limit,
+                   tokens + (now - updated) * self.limit / self.period)
+
+    def take(self, key, count=1):
+        """Забирает до ``count`` событий и возвращает, сколько разрешено."""
+        if not self.limit:
+            return count
+        now = self.clock()
+        with self.lock:
+            tokens = self.refill(key, now)
+            granted = min(count, int(tokens))
+            self.buckets[key] = (tokens - granted, now)
+        return granted
+
+    def wait(self, key):
+        """Сколько секунд ждать следующего события по ключу."""
+        if not self.limit:
+            return 0
+        with self.lock:
+            tokens = self.refill(key, self.clock())
+        return max(0, (1 - tokens) * self.period / self.limit)
@@ -0,0 +1,85 @@
+import os
+from collections import namedtuple
+
+from health import HOST as HEALTH_HOST
+from latency import REPORT_PERIOD, SLO, TARGET
+from sharding import LEASE_PERIOD
+from validation import WORKERS as VALIDATION_WORKERS
+
+FIELDS = (
+    'retry_period', 'message_catalog', 'message_locale', 'state_db',
+    'dedup_ttl', 'dedup_size', 'window_overlap', 'stream_responses',
+    'request_timeout', 'health_port', 'health_host', 'health_busy_timeout',
+    'health_watchdog', 'health_ready_timeout', 'shutdown_timeout',
+    'edit_messages', 'batch_linger', 'batch_size', 'bot_commands',
+    'tenants_file', 'sharding', 'worker_id', 'workers',
+    'shard_lease_period', 'run_once', 'run_once_lease_period',
+    'latency_slo', 'latency_target', 'latency_report_period',
+    'api_concurrency', 'poll_quota', 'message_quota', 'token_check',
+    'token_check_period', 'token_check_workers', 'snapshot_period')
+
+
+def flag(value):
+    """Разбирает булеву переменную окружения."""
+    return (value or '').lower() in ('1', 'true', 'yes')
+
+
+class Settings(namedtuple('Settings', FIELDS)):
+    """Настройки бота из переменных окружения.
+
+    Разбираются один раз: при запуске и при перезагрузке по SIGHUP,
+    которая создаёт новый объект вместо изменения текущего. Имена полей
+    совпадают с именами переменных окружения в нижнем регистре.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_env(cls, environ=None):
+        """Разбирает настройки из ``environ``, по умолчанию os.environ."""
+        env = os.environ if environ is None else environ
+        retry_period = int(env.get('RETRY_PERIOD', 600))
+        request_timeout = int(env.get('REQUEST_TIMEOUT', 30))
+        return cls(
+            retry_period=retry_period,
+            message_catalog=env.get('MESSAGE_CATALOG'),
+            message_locale=env.get('MESSAGE_LOCALE'),
+            state_db=env.get('STATE_DB'),
+            dedup_ttl=int(env.get('DEDUP_TTL', 7 * 24 * 60 * 60)),
+            dedup_size=int(env.get('DEDUP_SIZE', 1024)),
+            window_overlap=int(env.get('WINDOW_OVERLAP', 60)),
+            stream_responses=flag(env.get('STREAM_RESPONSES')),
+            request_timeout=request_timeout,
+            health_port=int(env.get('HEALTH_PORT', 0)),
+            health_host=env.get('HEALTH_HOST', HEALTH_HOST),
+            health_busy_timeout=int(
+                env.get('HEALTH_BUSY_TIMEOUT', 2 * request_timeout)),
+            health_watchdog=flag(env.get('HEALTH_WATCHDOG')),
+            health_ready_timeout=int(
+                env.get('HEALTH_READY_TIMEOUT', 3 * retry_period)),
+            shutdown_timeout=int(env.get('SHUTDOWN_TIMEOUT', 25)),
+            edit_messages=flag(env.get('EDIT_MESSAGES')),
+            batch_linger=float(env.get('BATCH_LINGER', 0)),
+            batch_size=int(env.get('BATCH_SIZE', 10)),
+            bot_commands=flag(env.get('BOT_COMMANDS')),
+            tenants_file=env.get('TENANTS_FILE'),
+            sharding=flag(env.get('SHARDING')),
+            worker_id=env.get('WORKER_ID'),
+            workers=int(env.get('WORKERS', 1)),
+            shard_lease_period=int(
+                env.get('SHARD_LEASE_PERIOD', LEASE_PERIOD)),
+            run_once=flag(env.get('RUN_ONCE')),
+            run_once_lease_period=int(env.get('RUN_ONCE_LEASE_PERIOD', 60)),
+            latency_slo=int(env.get('LATENCY_SLO', SLO)),
+            latency_target=float(env.get('LATENCY_TARGET', TARGET)),
+            latency_report_period=int(
+                env.get('LATENCY_REPORT_PERIOD', REPORT_PERIOD)),
+            api_concurrency=int(env.get('API_CONCURRENCY', 1)),
+            poll_quota=int(env.get('POLL_QUOTA', 0)),
+            message_quota=int(env.get('MESSAGE_QUOTA', 0)),
+            token_check=flag(env.get('TOKEN_CHECK', '1')),
+            token_check_period=int(env.get('TOKEN_CHECK_PERIOD', 6 * 3600)),
+            token_check_workers=int(
+                env.get('TOKEN_CHECK_WORKERS', VALIDATION_WORKERS)),
+            snapshot_period=int(env.get('SNAPSHOT_PERIOD', 300)),
+        )
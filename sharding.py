@@ -0,0 +1,132 @@
+import hashlib
+import logging
+import os
+import socket
+import threading
+import uuid
+from bisect import bisect
+
+SHARDS = 256
+REPLICAS = 64
+LEASE_PERIOD = 60
+WORKER_LEASE = 'worker:'
+SHARD_LEASE = 'shard:'
+
+SHARDS_CHANGED = 'Воркер {worker} владеет шардами: {count} из {total}'
+REFRESH_FAILED = 'Не удалось продлить аренду шардов: {error}'
+
+logger = logging.getLogger(__name__)
+
+
+def hash_point(key):
+    """Возвращает 64-битную точку на кольце хешей."""
+    return int.from_bytes(
+        hashlib.blake2b(str(key).encode(), digest_size=8).digest(), 'big')
+
+
+def default_worker_id():
+    """Возвращает уникальный id воркера: хост, pid и случайный суффикс."""
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+class HashRing:
+    """Консистентное хеширование ключей по узлам с виртуальными точками."""
+
+    def __init__(self, nodes, replicas=REPLICAS):
+        """Раскладывает по ``replicas`` точек на каждый узел."""
+        points = sorted(
+            (hash_point(f'{node}#{replica}'), node)
+            for node in nodes for replica in range(replicas))
+        self.points = [point for point, _ in points]
+        self.nodes = [node for _, node in points]
+
+    def owner(self, key):
+        """Возвращает узел ключа или None для пустого кольца."""
+        if not self.nodes:
+            return None
+        return self.nodes[bisect(self.points, hash_point(key))
+                          % len(self.nodes)]
+
+
+class ShardCoordinator:
+    """Распределяет арендаторов между процессами-воркерами.
+
+    Арендаторы раскладываются по ``shards`` шардам, шарды — по живым
+    воркерам через кольцо консистентного хеширования. Живость воркера и
+    владение шардом подтверждаются арендами в общем хранилище: воркер
+    опрашивает арендатора, только держа аренду его шарда. Аренды упавшего
+    воркера истекают через ``lease_period``, и его шарды забирают
+    оставшиеся. ``on_change`` вызывается с множеством полученных и
+    отданных шардов до того, как воркер начнёт их опрашивать, чтобы
+    сбросить локальные кеши: пока шард был у другого воркера, состояние
+    в хранилище могло измениться.
+    """
+
+    def __init__(self, store, worker_id=None, shards=SHARDS,
+                 lease_period=LEASE_PERIOD, on_change=None):
+        """Без ``worker_id`` воркер получает уникальный id."""
+        self.store = store
+        self.on_change = on_change
+        self.worker_id = worker_id or default_worker_id()
+        self.shards = shards
+        self.lease_period = lease_period
+        self.owned = frozenset()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def shard_of(self, tenant_id):
+        """Возвращает номер шарда арендатора."""
+        return hash_point(tenant_id) % self.shards
+
+    def owns(self, tenant_id):
+        """Проверяет, что шард арендатора у этого воркера."""
+        return self.shard_of(tenant_id) in self.owned
+
+    def refresh(self):
+        """Продлевает аренды и пересчитывает свои шарды."""
+        self.store.acquire_lease(
+            WORKER_LEASE + self.worker_id, self.worker_id, self.lease_period)
+        ring = HashRing(
+            owner for owner in self.store.leases(WORKER_LEASE).values())
+        owned = set()
+        for shard in range(self.shards):
+            name = f'{SHARD_LEASE}{shard}'
+            if ring.owner(shard) != self.worker_id:
+                if shard in self.owned:
+                    self.store.release_lease(name, self.worker_id)
+            elif self.store.acquire_lease(
+                    name, self.worker_id, self.lease_period):
+                owned.add(shard)
+        if owned != self.owned:
+            logger.info(SHARDS_CHANGED.format(
+                worker=self.worker_id, count=len(owned), total=self.shards))
+            if self.on_change is not None:
+                self.on_change(owned ^ self.owned)
+        self.owned = frozenset(owned)
+        return self.owned
+
+    def run(self):
+        """Продлевает аренды каждую треть периода до остановки."""
+        while not self.stopped.wait(self.lease_period / 3):
+            try:
+                self.refresh()
+            except Exception as error:
+                logger.exception(REFRESH_FAILED.format(error=error))
+
+    def start(self):
+        """Захватывает шарды и продлевает аренды в фоновом потоке."""
+        self.refresh()
+        self.thread = threading.Thread(
+            target=self.run, name='shard-leases', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Останавливает продление и освобождает аренды."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        for shard in self.owned:
+            self.store.release_lease(f'{SHARD_LEASE}{shard}', self.worker_id)
+        self.store.release_lease(WORKER_LEASE + self.worker_id, self.worker_id)
+        self.owned = frozenset()
@@ -0,0 +1,126 @@
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS state (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires REAL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+'''
+
+
+class StateStore:
+    """Хранилище состояния бота в SQLite.
+
+    Значения сериализуются в JSON и сгруппированы по пространствам имён.
+    Одну базу могут одновременно использовать несколько процессов.
+    """
+
+    def __init__(self, path=':memory:', timeout=30, clock=time.time):
+        """Открывает базу и создаёт таблицы, если их нет."""
+        self.path = path
+        self.clock = clock
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None,
+            check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+
+    def execute(self, sql, params=()):
+        """Выполняет запрос и возвращает все строки ответа."""
+        with self.lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def transaction(self, statements):
+        """Выполняет запросы одной транзакцией, возвращая их результаты."""
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                results = [
+                    self.connection.execute(sql, params).fetchall()
+                    for sql, params in statements]
+            except BaseException:
+                self.connection.execute('ROLLBACK')
+                raise
+            self.connection.execute('COMMIT')
+            return results
+
+    def get(self, namespace, key, default=None):
+        """Возвращает неистёкшее значение ключа или ``default``."""
+        rows = self.execute(
+            'SELECT value FROM state WHERE namespace = ? AND key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (namespace, key, self.clock()))
+        return json.loads(rows[0][0]) if rows else default
+
+    def set(self, namespace, key, value, expires=None):
+        """Сохраняет значение; ``expires`` — срок жизни, unix-время."""
+        self.execute(
+            'INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?)',
+            (namespace, key, json.dumps(value), expires))
+
+    def set_many(self, namespace, items, expires=None):
+        """Сохраняет пары (ключ, значение) одной транзакцией."""
+        self.transaction(
+            ('INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?)',
+             (namespace, key, json.dumps(value), expires))
+            for key, value in items)
+
+    def delete(self, namespace, key):
+        """Удаляет ключ из пространства имён."""
+        self.execute(
+            'DELETE FROM state WHERE namespace = ? AND key = ?',
+            (namespace, key))
+
+    def items(self, namespace):
+        """Возвращает неистёкшие пары (ключ, значение)."""
+        return [
+            (key, json.loads(value)) for key, value in self.execute(
+                'SELECT key, value FROM state WHERE namespace = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (namespace, self.clock()))]
+
+    def purge(self):
+        """Удаляет записи с истёкшим сроком жизни."""
+        self.execute(
+            'DELETE FROM state WHERE expires IS NOT NULL AND expires <= ?',
+            (self.clock(),))
+
+    def acquire_lease(self, name, owner, ttl):
+        """Захватывает или продлевает аренду, если она свободна или своя."""
+        now = self.clock()
+        with self.lock:
+            cursor = self.connection.execute(
+                'INSERT INTO leases VALUES (?, ?, ?) ON CONFLICT (name) '
+                'DO UPDATE SET owner = excluded.owner, '
+                'expires = excluded.expires '
+                'WHERE leases.owner = excluded.owner OR leases.expires <= ?',
+                (name, owner, now + ttl, now))
+            return cursor.rowcount == 1
+
+    def release_lease(self, name, owner):
+        """Освобождает аренду, если ею владеет ``owner``."""
+        self.execute(
+            'DELETE FROM leases WHERE name = ? AND owner = ?', (name, owner))
+
+    def leases(self, prefix=''):
+        """Возвращает действующие аренды с именем, начинающимся с prefix."""
+        return dict(self.execute(
+            'SELECT name, owner FROM leases WHERE name LIKE ? '
+            'AND expires > ?', (prefix + '%', self.clock())))
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,121 @@
+import codecs
+import json
+
+CHUNK_SIZE = 8192
+WHITESPACE = ' \t\n\r'
+
+UNEXPECTED_END = 'Ответ API оборвался на позиции {position}'
+UNEXPECTED_CHAR = (
+    'Ответ API: ожидался символ {expected}, получен "{char}" '
+    'на позиции {position}')
+NOT_OBJECT = 'Ответ API начинается не с объекта, а с "{char}"'
+
+
+class ArrayStream:
+    """Инкрементально разбирает JSON-объект, отдавая элементы массива.
+
+    Элементы массива под ключом ``key`` выдаются по одному, остальные поля
+    верхнего уровня собираются в ``fields``. В памяти одновременно держится
+    не больше одного элемента и одного куска ответа.
+    """
+
+    def __init__(self, chunks, key):
+        """``chunks`` — куски текста ответа, ``key`` — ключ массива."""
+        self.key = key
+        self.fields = {}
+        self.found = False
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._offset = 0
+        self._eof = False
+
+    def __iter__(self):
+        """Выдаёт элементы массива по мере разбора ответа."""
+        if self._next_char() != '{':
+            raise TypeError(
+                NOT_OBJECT.format(char=self._buffer[self._pos - 1]))
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self._decode_value()
+            self._expect(':')
+            if key == self.key and self._peek() == '[':
+                self.found = True
+                yield from self._iter_array()
+            else:
+                self.fields[key] = self._decode_value()
+            if self._expect(',}') == '}':
+                return
+
+    def _iter_array(self):
+        self._pos += 1
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._decode_value()
+            if self._expect(',]') == ']':
+                return
+
+    def _fill(self):
+        """Дочитывает кусок ответа, отбрасывая уже разобранную часть."""
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            self._offset += self._pos
+            self._buffer = self._buffer[self._pos:] + chunk
+            self._pos = 0
+            return True
+        self._eof = True
+        return False
+
+    def _peek(self):
+        while True:
+            while (self._pos < len(self._buffer)
+                   and self._buffer[self._pos] in WHITESPACE):
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise ValueError(
+                    UNEXPECTED_END.format(position=self._offset + self._pos))
+
+    def _next_char(self):
+        char = self._peek()
+        self._pos += 1
+        return char
+
+    def _expect(self, expected):
+        char = self._next_char()
+        if char not in expected:
+            raise ValueError(UNEXPECTED_CHAR.format(
+                expected=expected, char=char,
+                position=self._offset + self._pos - 1))
+        return char
+
+    def _decode_value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # Число или литерал в конце буфера может продолжиться в
+            # следующем куске.
+            if end == len(self._buffer) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def iter_text(response, chunk_size=CHUNK_SIZE):
+    """Декодирует тело ответа requests по кускам."""
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')()
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
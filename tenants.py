@@ -0,0 +1,42 @@
+import json
+
+
+class Tenant:
+    """Получатель уведомлений: токен API Практикума и чат в Telegram.
+
+    ``weight`` — доля арендатора при справедливом распределении опросов и
+    отправок относительно остальных.
+    """
+
+    __slots__ = ('id', 'practicum_token', 'chat_id', 'locale', 'weight')
+
+    def __init__(self, practicum_token, chat_id, locale=None, id=None,
+                 weight=1):
+        """Без ``id`` арендатор получает id по номеру чата."""
+        self.practicum_token = practicum_token
+        self.chat_id = chat_id
+        self.locale = locale
+        self.id = str(chat_id if id is None else id)
+        self.weight = weight
+
+    @property
+    def headers(self):
+        """Заголовки запросов к API с токеном арендатора."""
+        return {'Authorization': f'OAuth {self.practicum_token}'}
+
+    def __repr__(self):
+        """Показывает арендатора без токена."""
+        return f'Tenant(id={self.id!r}, chat_id={self.chat_id!r})'
+
+
+def load_tenants(path, default):
+    """Загружает арендаторов из JSON-файла.
+
+    Файл — список объектов с ключами ``practicum_token``, ``chat_id`` и
+    необязательными ``locale``, ``id`` и ``weight``. Без файла возвращается
+    единственный арендатор ``default``.
+    """
+    if not path:
+        return [default]
+    with open(path, encoding='utf-8') as file:
+        return [Tenant(**tenant) for tenant in json.load(file)]
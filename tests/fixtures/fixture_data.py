@@ -23,6 +23,31 @@ def homework_module():
     return homework
 
 
+@pytest.fixture
+def offline_main(monkeypatch, homework_module):
+    """Готовит main() и run_once() к запуску без сети и проверки токенов."""
+    monkeypatch.setattr(homework_module, 'check_tokens', lambda: None)
+    monkeypatch.setattr(homework_module.telegram, 'Bot', lambda token: None)
+    monkeypatch.setattr(homework_module, 'settings',
+                        homework_module.settings._replace(token_check=False))
+    monkeypatch.setattr(
+        homework_module, 'poll_scheduler', homework_module.FairScheduler())
+    return homework_module
+
+
+@pytest.fixture
+def polled(monkeypatch, offline_main):
+    """Два арендатора, опросы которых записываются вместо запросов к API."""
+    polled = []
+    monkeypatch.setattr(
+        offline_main, 'load_tenants', lambda path, default: [
+            offline_main.Tenant('a', 1), offline_main.Tenant('b', 2)])
+    monkeypatch.setattr(
+        offline_main, 'poll_tenant',
+        lambda runtime, tenant, window: polled.append(tenant.id))
+    return polled
+
+
 @pytest.fixture
 def random_message():
     def random_string(string_length=15):
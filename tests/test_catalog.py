@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from catalog import MessageCatalog, compile_template
+from models import Homework
+from utils import patch_settings
+
+LOCALES = {
+    'ru': {
+        'status': 'Изменился статус проверки работы "{homework_name}".{verdict}',
+        'comment': '\nКомментарий ревьюера: {comment}',
+        'verdicts': {'approved': 'Ура!', 'rejected': 'Есть замечания.'},
+    },
+}
+
+
+@pytest.fixture
+def catalog_file(tmp_path):
+    path = tmp_path / 'catalog.json'
+    path.write_text(json.dumps({
+        'show_comments': True,
+        'locales': {
+            'ru': {'verdicts': {'on_hold': 'Работа {на паузе}.'}},
+            'en': {
+                'status': 'Homework "{homework_name}": {verdict}',
+                'comment': ' ({comment})',
+                'verdicts': {'approved': 'approved!'},
+            },
+        },
+    }), encoding='utf-8')
+    return path
+
+
+class TestMessageCatalog:
+    def test_compile_template(self):
+        pieces = compile_template(
+            'a{homework_name}b{verdict}c', ('homework_name', 'verdict'),
+            verdict='{V}')
+        assert pieces == ('a', ('homework_name',), 'b{V}c')
+
+    @pytest.mark.parametrize('template', ['{unknown}', '{verdict!r}',
+                                          '{verdict:>10}'])
+    def test_compile_template_rejects(self, template):
+        with pytest.raises(ValueError):
+            compile_template(template, ('verdict',), verdict='x')
+
+    def test_builtin_locale(self):
+        catalog = MessageCatalog.load(None, LOCALES, 'ru')
+        homework = Homework(1, 'hw', 'approved', reviewer_comment='ok')
+        assert catalog.render(homework) == (
+            'Изменился статус проверки работы "hw".Ура!')
+        assert not catalog.knows('on_hold')
+        with pytest.raises(KeyError):
+            catalog.render(Homework(1, 'hw', 'on_hold'))
+
+    def test_file_locales_and_comments(self, catalog_file):
+        catalog = MessageCatalog.load(catalog_file, LOCALES, 'ru')
+        homework = Homework(1, 'hw', 'approved', reviewer_comment='ok')
+        assert catalog.render(homework, 'en') == 'Homework "hw": approved! (ok)'
+        assert catalog.render(Homework(2, 'hw', 'on_hold'), 'en') == (
+            'Изменился статус проверки работы "hw".Работа {на паузе}.')
+        assert catalog.render(Homework(2, 'hw', 'rejected', None, 'x'),
+                              'de') == (
+            'Изменился статус проверки работы "hw".Есть замечания.'
+            '\nКомментарий ревьюера: x')
+        assert LOCALES['ru']['verdicts'] == {
+            'approved': 'Ура!', 'rejected': 'Есть замечания.'}
+
+    def test_rendered_messages_are_cached(self):
+        catalog = MessageCatalog.load(None, LOCALES, 'ru', cache_size=2)
+        homework = Homework(1, 'hw', 'approved')
+        first = catalog.render(homework)
+        assert catalog.render(Homework(1, 'hw', 'approved')) is first
+        info = catalog.render_cached.cache_info()
+        assert (info.hits, info.misses, info.maxsize) == (1, 1, 2)
+
+
+def test_parse_status_uses_catalog_locale(monkeypatch, catalog_file,
+                                          homework_module):
+    patch_settings(
+        monkeypatch, homework_module, message_catalog=str(catalog_file),
+        message_locale='en')
+    homework_module.load_catalog.cache_clear()
+    try:
+        assert homework_module.parse_status(
+            {'homework_name': 'hw', 'status': 'approved'}
+        ) == 'Homework "hw": approved!'
+        with pytest.raises(ValueError):
+            homework_module.parse_status(
+                {'homework_name': 'hw', 'status': 'unknown'})
+    finally:
+        homework_module.load_catalog.cache_clear()
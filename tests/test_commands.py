@@ -0,0 +1,101 @@
+import time
+from types import SimpleNamespace
+
+from commands import NO_DATA, UNKNOWN_COMMAND, CommandPoller, StatusBoard
+from models import Homework
+from state import StateStore
+from tenants import Tenant
+from utils import FakeBot
+
+
+def render(homework, locale=None):
+    return f'{homework.name}:{homework.status}:{locale}'
+
+
+def update(update_id, chat_id, text):
+    return SimpleNamespace(update_id=update_id, message=SimpleNamespace(
+        chat_id=chat_id, text=text))
+
+
+class TestStatusBoard:
+    def test_status_and_history(self):
+        board = StatusBoard(render)
+        assert board.reply(1, '/status') == NO_DATA
+        board.update(1, Homework(10, 'old', 'approved', 100))
+        board.update(1, Homework(11, 'new', 'reviewing', 200))
+        board.update(1, Homework(11, 'new', 'reviewing', 200))
+        board.update(1, Homework(11, 'new', 'rejected', 300))
+        assert board.reply(1, '/status', 'ru') == (
+            'new:rejected:ru\n\nold:approved:ru')
+        assert board.reply(1, '/history') == (
+            'new:rejected:None\n\nnew:reviewing:None\n\nold:approved:None')
+        assert board.reply(1, '/start') == UNKNOWN_COMMAND
+        assert board.reply(2, '/status') == NO_DATA
+
+    def test_replies_cached_until_update(self):
+        calls = []
+        board = StatusBoard(lambda homework, locale: calls.append(1) or 'x')
+        board.update(1, Homework(10, 'hw', 'approved', 100))
+        board.reply(1, '/status')
+        board.reply(1, '/status')
+        assert len(calls) == 1
+        board.update(1, Homework(10, 'hw', 'rejected', 200))
+        board.reply(1, '/status')
+        assert len(calls) == 2
+
+    def test_replies_cached_per_locale(self):
+        board = StatusBoard(render)
+        board.update(1, Homework(10, 'hw', 'approved', 100))
+        assert board.reply(1, '/status', 'ru') == 'hw:approved:ru'
+        assert board.reply(1, '/status', 'en') == 'hw:approved:en'
+
+    def test_shared_through_store(self):
+        store = StateStore()
+        StatusBoard(render, store=store).update(
+            1, Homework(10, 'hw', 'approved', 100))
+        other = StatusBoard(render, store=store)
+        assert other.reply(1, '/status') == 'hw:approved:None'
+        other.update(1, Homework(11, 'hw2', 'reviewing', 200))
+        assert other.reply(1, '/history') == (
+            'hw2:reviewing:None\n\nhw:approved:None')
+
+    def test_reply_is_fast(self):
+        board = StatusBoard(render)
+        for number in range(30):
+            board.update(1, Homework(number, f'hw{number}', 'approved',
+                                     number))
+        board.reply(1, '/status')
+        started = time.perf_counter()
+        for _ in range(1000):
+            board.reply(1, '/status')
+            board.reply(1, '/history')
+        assert (time.perf_counter() - started) / 2000 < 0.01
+
+
+class TestCommandPoller:
+    def test_replies_to_known_chats(self):
+        board = StatusBoard(render)
+        board.update(1, Homework(10, 'hw', 'approved', 100))
+        sent = []
+        bot = FakeBot(updates=[update(5, 1, '/status@homework_bot'),
+                               update(6, 99, '/status'),
+                               update(7, 1, '/history extra')])
+        store = StateStore()
+        poller = CommandPoller(
+            bot, board, lambda bot, chat_id, text: sent.append((chat_id, text)),
+            {'1': Tenant('token', 1, 'en')}, store=store)
+        assert poller.poll() == 3
+        assert sent == [(1, 'hw:approved:en'), (1, 'hw:approved:en')]
+        assert store.get('commands', 'offset') == 8
+        assert CommandPoller(bot, board, None, {}, store=store).offset == 8
+
+    def test_waits_for_leadership(self):
+        bot = FakeBot()
+        poller = CommandPoller(
+            bot, StatusBoard(render), None, {}, timeout=0.01,
+            leader=lambda: False)
+        poller.start()
+        time.sleep(0.05)
+        poller.stop()
+        poller.thread.join()
+        assert bot.calls == []
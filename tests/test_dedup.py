@@ -0,0 +1,81 @@
+import pytest
+
+from dedup import DedupIndex
+from state import StateStore
+from utils import FakeClock
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestDedupIndex:
+    def test_transition_delivered_once(self, clock):
+        dedup = DedupIndex(ttl=60, clock=clock)
+        assert dedup.is_new(1, 10, 'reviewing', 100)
+        dedup.remember(1, 10, 'reviewing', 100)
+        assert not dedup.is_new(1, 10, 'reviewing', 100)
+        assert dedup.is_new(2, 10, 'reviewing', 100)
+
+    def test_alternating_statuses(self, clock):
+        dedup = DedupIndex(ttl=60, clock=clock)
+        for status, version in [('reviewing', 1), ('rejected', 2)]:
+            dedup.remember(1, 10, status, version)
+        assert not dedup.is_new(1, 10, 'rejected', 2)
+        assert dedup.is_new(1, 10, 'reviewing', 3)
+
+    def test_ttl(self, clock):
+        dedup = DedupIndex(ttl=60, clock=clock)
+        dedup.remember(1, 'error', 'Ошибка')
+        clock.now += 59
+        assert not dedup.is_new(1, 'error', 'Ошибка')
+        clock.now += 1
+        assert dedup.is_new(1, 'error', 'Ошибка')
+
+    def test_memory_capped_per_chat(self, clock):
+        dedup = DedupIndex(ttl=60, max_per_chat=2, clock=clock)
+        for subject in range(3):
+            dedup.remember(1, subject, 'approved')
+        dedup.remember(2, 0, 'approved')
+        assert len(dedup.chats[1]) == 2
+        assert dedup.is_new(1, 0, 'approved')
+        assert not dedup.is_new(1, 2, 'approved')
+        assert not dedup.is_new(2, 0, 'approved')
+
+    def test_survives_restart_with_store(self, clock, tmp_path):
+        path = str(tmp_path / 'state.db')
+        DedupIndex(ttl=60, store=StateStore(path, clock=clock),
+                   clock=clock).remember(1, 10, 'approved', 5)
+        dedup = DedupIndex(ttl=60, store=StateStore(path, clock=clock),
+                           clock=clock)
+        assert not dedup.is_new(1, 10, 'approved', 5)
+        clock.now += 60
+        dedup = DedupIndex(ttl=60, store=StateStore(path, clock=clock),
+                           clock=clock)
+        assert dedup.is_new(1, 10, 'approved', 5)
+
+
+def test_main_does_not_resend_errors(monkeypatch, offline_main,
+                                     homework_module):
+    sent = []
+    sleeps = []
+
+    class Stop(Exception):
+        pass
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 3:
+            raise Stop
+
+    def get_homeworks(timestamp):
+        raise ValueError('API недоступен')
+
+    monkeypatch.setattr(homework_module, 'get_homeworks', get_homeworks)
+    monkeypatch.setattr(homework_module, 'send_message',
+                        lambda bot, message: sent.append(message) or True)
+    monkeypatch.setattr(homework_module.time, 'sleep', sleep)
+    with pytest.raises(Stop):
+        homework_module.main()
+    assert len(sent) == 1
@@ -0,0 +1,212 @@
+from types import SimpleNamespace
+
+import pytest
+
+from delivery import Entry, LiveMessages, Outbox, pack
+from state import StateStore
+from utils import FakeBot, FakeClock, make_runtime, patch_settings
+
+
+def test_live_messages_persisted():
+    store = StateStore()
+    LiveMessages(store).set(1, 10, 555)
+    assert LiveMessages(store).get(1, 10) == 555
+    assert LiveMessages(store).get(1, 11) is None
+
+
+@pytest.fixture
+def edit_mode(monkeypatch, homework_module):
+    patch_settings(monkeypatch, homework_module, edit_messages=True)
+    return homework_module
+
+
+def test_transitions_edit_one_message(edit_mode):
+    bot = FakeBot()
+    runtime = make_runtime(edit_mode, bot)
+    tenant = edit_mode.Tenant('token', 1)
+    for status, version in [('reviewing', 1), ('rejected', 2),
+                            ('approved', 3)]:
+        assert edit_mode.notify(runtime, tenant, 10, status, status, version)
+    assert bot.sent == [(1, 'reviewing')]
+    assert bot.edited == [(1, 1, 'rejected'), (1, 1, 'approved')]
+
+
+def test_failed_edit_falls_back_to_new_message(edit_mode):
+    bot = FakeBot(fail_edits='Message to edit not found')
+    runtime = make_runtime(edit_mode, bot)
+    tenant = edit_mode.Tenant('token', 1)
+    edit_mode.notify(runtime, tenant, 10, 'reviewing', 'reviewing', 1)
+    edit_mode.notify(runtime, tenant, 10, 'approved', 'approved', 2)
+    assert bot.sent == [(1, 'reviewing'), (1, 'approved')]
+    assert runtime.live.get(1, 10) == 2
+
+
+def test_not_modified_counts_as_delivered(edit_mode):
+    bot = FakeBot(fail_edits='Message is not modified: ...')
+    runtime = make_runtime(edit_mode, bot)
+    runtime.live.set(1, 10, 7)
+    assert edit_mode.notify(
+        runtime, edit_mode.Tenant('token', 1), 10, 'approved', 'text', 1)
+    assert bot.sent == []
+
+
+def test_errors_are_not_edited(edit_mode):
+    bot = FakeBot()
+    runtime = make_runtime(edit_mode, bot)
+    tenant = edit_mode.Tenant('token', 1)
+    edit_mode.notify(runtime, tenant, 'error', 'first', 'first')
+    edit_mode.notify(runtime, tenant, 'error', 'second', 'second')
+    assert bot.sent == [(1, 'first'), (1, 'second')]
+    assert bot.edited == []
+
+
+def entry(chat_id, key, text=None, version=None, sent=None):
+    on_sent = None if sent is None else (lambda: sent.append(key))
+    return Entry(chat_id, key, text or str(key), version, on_sent)
+
+
+def test_pack_joins_texts_up_to_limit():
+    assert pack(['aa', 'bb', 'cc'], limit=6, separator='|') == [
+        (2, ['aa|bb']), (1, ['cc'])]
+    assert pack(['a', 'bbbbbbb', 'c'], limit=3, separator='|') == [
+        (1, ['a']), (1, ['bbb', 'bbb', 'b']), (1, ['c'])]
+    assert pack([]) == []
+
+
+def test_outbox_lingers_and_batches_per_chat():
+    clock = FakeClock()
+    batches = []
+    outbox = Outbox(
+        lambda chat_id, entries: batches.append((chat_id, entries))
+        or len(entries), linger=2, max_batch=3, clock=clock)
+    for key in range(2):
+        assert outbox.put(entry(1, key))
+    assert outbox.put(entry(1, 0)) is None
+    outbox.put(entry(2, 'x'))
+    assert outbox.flush() == 0
+    clock.now += 2
+    assert outbox.flush() == 3
+    assert [(chat_id, [item.key for item in entries])
+            for chat_id, entries in batches] == [(1, [0, 1]), (2, ['x'])]
+    assert outbox.depth() == 0
+
+
+def test_outbox_full_batch_is_sent_without_linger():
+    outbox = Outbox(lambda chat_id, entries: len(entries), linger=60,
+                    max_batch=2, clock=FakeClock())
+    for key in range(3):
+        outbox.put(entry(1, key))
+    assert outbox.flush() == 2
+    assert outbox.depth() == 1
+
+
+def test_outbox_requeues_undelivered_in_order():
+    clock = FakeClock()
+    sent = []
+    results = [1, 2]
+    outbox = Outbox(lambda chat_id, entries: results.pop(0), linger=0,
+                    retry_delay=5, clock=clock)
+    for key in range(3):
+        outbox.put(entry(1, key, version=key, sent=sent))
+    assert outbox.flush() == 1
+    assert sent == [0]
+    assert outbox.pending_versions(1) == [1, 2]
+    assert outbox.flush() == 0
+    clock.now += 5
+    assert outbox.flush() == 2
+    assert sent == [0, 1, 2]
+    assert outbox.depth() == 0
+
+
+def test_outbox_stop_drains_queue():
+    delivered = []
+    outbox = Outbox(
+        lambda chat_id, entries: delivered.extend(entries) or len(entries),
+        linger=60).start()
+    outbox.put(entry(1, 'a'))
+    assert outbox.stop(timeout=5) == 0
+    assert [item.key for item in delivered] == ['a']
+
+
+def test_outbox_stop_shares_one_deadline():
+    clock = FakeClock()
+
+    def send(chat_id, entries):
+        clock.now += 1
+        return 1
+
+    outbox = Outbox(send, linger=60, clock=clock)
+    for key in range(5):
+        outbox.put(entry(key, key))
+    outbox.thread = SimpleNamespace(
+        join=lambda timeout: setattr(clock, 'now', clock.now + timeout))
+    assert outbox.stop(timeout=3) == 5
+
+
+def test_notify_batches_messages(homework_module):
+    bot = FakeBot()
+    clock = FakeClock()
+    outbox = Outbox(None, linger=2, clock=clock)
+    runtime = make_runtime(homework_module, bot, outbox=outbox)
+    outbox.send = lambda chat_id, entries: homework_module.send_batch(
+        runtime, chat_id, entries)
+    tenant = homework_module.Tenant('token', 1)
+    assert homework_module.notify(runtime, tenant, 10, 'reviewing', 'a', 1)
+    assert homework_module.notify(runtime, tenant, 11, 'approved', 'b', 2)
+    assert homework_module.notify(
+        runtime, tenant, 10, 'reviewing', 'a', 1) is None
+    clock.now += 2
+    outbox.flush()
+    assert bot.sent == [(1, 'a\n\nb')]
+    assert homework_module.notify(
+        runtime, tenant, 11, 'approved', 'b', 2) is None
+
+
+def test_outbox_flush_keeps_idle_worker_alive(monkeypatch, homework_module):
+    clock = FakeClock()
+    monkeypatch.setattr(homework_module, 'health', homework_module.Health(
+        busy_timeout=60, clock=clock))
+    runtime = make_runtime(homework_module, FakeBot())
+    homework_module.health.idle(600)
+    clock.now += 2
+    homework_module.send_batch(runtime, 1, [entry(1, 'a'), entry(1, 'b')])
+    clock.now += 100
+    assert homework_module.health.alive()
+
+
+def test_pending_versions_include_batch_being_sent():
+    versions = []
+    outbox = Outbox(None, linger=0)
+    outbox.send = lambda chat_id, entries: versions.append(
+        outbox.pending_versions(chat_id)) or 0
+    outbox.put(entry(1, 'a', version=7))
+    outbox.flush()
+    assert versions == [[7]]
+    assert outbox.pending_versions(1) == [7]
+
+
+def test_split_message_parts_not_resent(homework_module):
+    class FlakyBot(FakeBot):
+        failed = False
+
+        def send_message(self, chat_id, text):
+            if len(self.sent) == 2 and not self.failed:
+                self.failed = True
+                raise homework_module.telegram.error.NetworkError('timeout')
+            return super().send_message(chat_id, text)
+
+    bot = FlakyBot()
+    clock = FakeClock()
+    outbox = Outbox(None, linger=0, retry_delay=1, clock=clock)
+    runtime = make_runtime(homework_module, bot, outbox=outbox)
+    outbox.send = lambda chat_id, entries: homework_module.send_batch(
+        runtime, chat_id, entries)
+    text = 'x' * 4096 + 'y' * 4096 + 'z'
+    outbox.put(entry(1, 'a'))
+    outbox.put(entry(1, 'long', text))
+    assert outbox.flush() == 1
+    clock.now += 1
+    assert outbox.flush() == 1
+    assert [sent for _, sent in bot.sent] == [
+        'a', 'x' * 4096, 'y' * 4096, 'z']
+    assert outbox.depth() == 0
@@ -0,0 +1,92 @@
+import json
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from health import Health, serve
+from state import StateStore
+from utils import FakeClock, make_runtime, patch_settings
+from validation import Quarantine
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(0)
+
+
+class TestHealth:
+    def test_liveness_while_busy(self, clock):
+        health = Health(busy_timeout=60, clock=clock)
+        health.beat()
+        clock.now = 60
+        assert health.alive()
+        clock.now = 61
+        assert not health.alive()
+
+    def test_liveness_while_idle(self, clock):
+        health = Health(busy_timeout=60, idle_grace=30, clock=clock)
+        health.idle(600)
+        clock.now = 630
+        assert health.alive()
+        clock.now = 631
+        assert not health.alive()
+        health.beat()
+        assert health.alive()
+
+    def test_readiness(self, clock):
+        health = Health(ready_timeout=100, send_failures=2, clock=clock)
+        assert not health.ready()
+        health.record('poll')
+        assert health.ready()
+        health.record('send', ok=False)
+        assert health.ready()
+        health.record('send', ok=False)
+        assert not health.ready()
+        health.record('send')
+        clock.now = 101
+        assert not health.ready()
+
+    def test_report_subsystems(self, clock):
+        health = Health(clock=clock)
+        health.register('queue', lambda: {'depth': 3})
+        health.register('broken', lambda: 1 / 0)
+        health.record('poll', ok=False)
+        report = health.report()
+        assert report['subsystems']['queue'] == {'depth': 3, 'ok': True}
+        assert not report['subsystems']['broken']['ok']
+        assert report['events']['poll']['consecutive_failures'] == 1
+
+
+def test_http_endpoints():
+    health = Health()
+    server = serve(health, 0)
+    assert server.server_address[0] == '127.0.0.1'
+    url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+    try:
+        with urlopen(url + '/livez') as response:
+            assert json.load(response) == {'alive': True}
+        with pytest.raises(HTTPError) as error:
+            urlopen(url + '/readyz')
+        assert error.value.code == 503
+        health.record('poll')
+        with urlopen(url + '/healthz') as response:
+            assert json.load(response)['ready']
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_report_hides_tenant_ids(monkeypatch, tmp_path, homework_module):
+    patch_settings(
+        monkeypatch, homework_module, health_port=0, health_watchdog=False)
+    monkeypatch.setattr(homework_module, 'health', Health())
+    path = str(tmp_path / 'state.db')
+    runtime = make_runtime(homework_module, None, StateStore(path))._replace(
+        quarantine=Quarantine())
+    runtime.quarantine.add('424242', 'rejected')
+    homework_module.start_health(runtime)
+    report = json.dumps(homework_module.health.report())
+    assert '424242' not in report and path not in report
+    assert homework_module.health.report()['subsystems']['quarantine'][
+        'count'] == 1
@@ -0,0 +1,91 @@
+import pytest
+
+from latency import Histogram, LatencyTracker
+from utils import FakeBot, FakeClock, make_runtime
+
+
+class TestHistogram:
+    def test_quantiles_use_bucket_bounds(self):
+        histogram = Histogram((10, 60, 300))
+        for value in (1, 5, 30, 45, 200, 1000):
+            histogram.observe(value)
+        assert histogram.quantile(0.3) == 10
+        assert histogram.quantile(0.5) == 60
+        assert histogram.quantile(0.8) == 300
+        assert histogram.quantile(1) == float('inf')
+        assert Histogram().quantile(0.5) is None
+
+    def test_share_within(self):
+        histogram = Histogram((10, 60, 300))
+        for value in (10, 30, 100, 100):
+            histogram.observe(value)
+        assert histogram.share_within(60) == 0.5
+        assert histogram.share_within(100) == 0.5
+        assert histogram.share_within(300) == 1
+
+    def test_export_is_cumulative(self):
+        histogram = Histogram((10, 60))
+        for value in (1, 20, 20, 100):
+            histogram.observe(value)
+        assert histogram.export() == {
+            'buckets': {'10': 1, '60': 3, '+Inf': 4},
+            'sum': 141.0, 'count': 4}
+
+
+class TestLatencyTracker:
+    def test_stages_and_report(self):
+        clock = FakeClock(10_000)
+        tracker = LatencyTracker(slo=300, target=0.5, period=60,
+                                 bounds=(60, 300, 900), clock=clock)
+        tracker.record('a', updated=9_500, polled=9_900, enqueued=9_990)
+        tracker.record('a', updated=9_950, polled=9_990, enqueued=9_995)
+        tracker.record('b', updated=9_000, polled=9_990, enqueued=9_995,
+                       delivered=10_000)
+        stages = tracker.export()
+        assert stages['discovery']['buckets'] == {
+            '60': 1, '300': 1, '900': 2, '+Inf': 3}
+        assert stages['queue']['buckets']['60'] == 3
+        assert stages['total']['buckets'] == {
+            '60': 1, '300': 1, '900': 2, '+Inf': 3}
+        report = tracker.report()
+        assert report['a'] == {
+            'count': 2, 'p50': 60, 'p95': 900, 'p99': 900,
+            'within_slo': 0.5, 'met': True}
+        assert report['b']['met'] is False
+        assert len(tracker.describe(report)) == 2
+        assert tracker.report() == {}
+        assert tracker.export()['total']['count'] == 3
+
+    def test_due_after_period(self):
+        clock = FakeClock()
+        tracker = LatencyTracker(period=60, clock=clock)
+        assert not tracker.due()
+        clock.now += 60
+        assert tracker.due()
+        tracker.report()
+        assert not tracker.due()
+
+    def test_skips_unknown_update_time(self):
+        tracker = LatencyTracker()
+        tracker.record('a', updated='2022-01-01', polled=1, enqueued=1)
+        assert tracker.report() == {}
+
+
+@pytest.fixture
+def tracker(monkeypatch, homework_module):
+    tracker = LatencyTracker()
+    monkeypatch.setattr(homework_module, 'latency', tracker)
+    return tracker
+
+
+def test_notify_records_delivery_latency(tracker, homework_module):
+    runtime = make_runtime(homework_module, FakeBot())
+    tenant = homework_module.Tenant('token', 1)
+    polled = tracker.clock()
+    homework_module.notify(
+        runtime, tenant, 10, 'approved', 'text', int(polled) - 120, polled)
+    homework_module.notify(runtime, tenant, 'error', 'failed', 'failed')
+    report = tracker.report()
+    assert list(report) == ['1']
+    assert report['1']['count'] == 1
+    assert report['1']['p50'] == 300
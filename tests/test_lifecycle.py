@@ -0,0 +1,141 @@
+import signal
+import time
+
+import pytest
+
+from lifecycle import Lifecycle
+from utils import make_runtime, patch_settings
+
+
+class Stop(Exception):
+    pass
+
+
+class TestLifecycle:
+    def test_signal_interrupts_sleep(self):
+        lifecycle = Lifecycle(timeout=60)
+        with lifecycle.handle_signals():
+            with lifecycle.interruptible():
+                signal.raise_signal(signal.SIGTERM)
+                time.sleep(60)
+            assert lifecycle.stopping.is_set()
+            assert lifecycle.pending()
+        assert lifecycle.deadline.finished.is_set()
+
+    def test_signal_does_not_interrupt_work(self):
+        lifecycle = Lifecycle()
+        finished = False
+        with lifecycle.handle_signals():
+            signal.raise_signal(signal.SIGHUP)
+            finished = True
+        assert finished
+        assert lifecycle.reloading.is_set()
+        assert not lifecycle.stopping.is_set()
+
+    def test_remaining_counts_down_from_stop(self):
+        lifecycle = Lifecycle(timeout=60)
+        assert lifecycle.remaining() == 60
+        with lifecycle.handle_signals():
+            signal.raise_signal(signal.SIGTERM)
+            time.sleep(0.05)
+            assert 59 < lifecycle.remaining() < 60
+
+    def test_handlers_restored(self):
+        previous = signal.getsignal(signal.SIGTERM)
+        with pytest.raises(Stop):
+            with Lifecycle().handle_signals():
+                assert signal.getsignal(signal.SIGTERM) != previous
+                raise Stop
+        assert signal.getsignal(signal.SIGTERM) == previous
+
+
+@pytest.fixture
+def patched_main(monkeypatch, polled, homework_module):
+    patch_settings(monkeypatch, homework_module, retry_period=600)
+    return polled
+
+
+def test_sigterm_finishes_current_poll_and_stops(monkeypatch, patched_main,
+                                                homework_module):
+    def poll_tenant(runtime, tenant, window):
+        patched_main.append(tenant.id)
+        signal.raise_signal(signal.SIGTERM)
+
+    def sleep(seconds):
+        raise AssertionError('Бот не должен засыпать после SIGTERM')
+
+    monkeypatch.setattr(homework_module, 'poll_tenant', poll_tenant)
+    monkeypatch.setattr(homework_module.time, 'sleep', sleep)
+    homework_module.main()
+    assert patched_main == ['1']
+
+
+def test_sighup_reloads_config(monkeypatch, patched_main, homework_module):
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 1:
+            signal.raise_signal(signal.SIGHUP)
+            time.sleep(0)
+            raise AssertionError('Сон не прерван сигналом')
+        raise Stop
+
+    monkeypatch.setenv('RETRY_PERIOD', '5')
+    monkeypatch.setattr(homework_module.time, 'sleep', sleep)
+    with pytest.raises(Stop):
+        homework_module.main()
+    assert sleeps == [600, 5]
+    assert sorted(patched_main[:2]) == sorted(patched_main[2:]) == ['1', '2']
+
+
+def test_signal_before_sleep_is_not_lost(monkeypatch, patched_main,
+                                         homework_module):
+    def sleep(seconds):
+        raise AssertionError('Сигнал до сна потерян')
+
+    monkeypatch.setattr(
+        homework_module.health, 'idle',
+        lambda seconds: signal.raise_signal(signal.SIGTERM))
+    monkeypatch.setattr(homework_module.time, 'sleep', sleep)
+    homework_module.main()
+    assert sorted(patched_main) == ['1', '2']
+
+
+def test_shutdown_runs_before_force_exit_deadline(
+        monkeypatch, patched_main, homework_module):
+    stopped = []
+
+    def poll_tenant(runtime, tenant, window):
+        signal.raise_signal(signal.SIGTERM)
+
+    def shutdown(runtime, leases=None, timeout=None):
+        handler = signal.getsignal(signal.SIGTERM)
+        stopped.append((isinstance(getattr(handler, '__self__', None),
+                                   Lifecycle), timeout))
+
+    patch_settings(monkeypatch, homework_module, shutdown_timeout=25)
+    monkeypatch.setattr(homework_module, 'poll_tenant', poll_tenant)
+    monkeypatch.setattr(homework_module, 'shutdown', shutdown)
+    homework_module.main()
+    [(inside, timeout)] = stopped
+    assert inside
+    assert 0 < timeout <= 25
+
+
+def test_reload_rebuilds_default_tenant_from_env(monkeypatch,
+                                                 homework_module):
+    for name in ('settings', 'PRACTICUM_TOKEN', 'TELEGRAM_CHAT_ID',
+                 'HEADERS'):
+        monkeypatch.setattr(
+            homework_module, name, getattr(homework_module, name))
+    patch_settings(monkeypatch, homework_module, tenants_file=None)
+    monkeypatch.setenv('MESSAGE_LOCALE', 'en')
+    monkeypatch.setenv('PRACTICUM_TOKEN', 'rotated')
+    monkeypatch.setenv('TELEGRAM_CHAT_ID', '42')
+    runtime = make_runtime(homework_module, None)
+    homework_module.reload_config(runtime)
+    [tenant] = runtime.tenants
+    assert (tenant.practicum_token, tenant.chat_id, tenant.locale) == (
+        'rotated', '42', 'en')
+    assert homework_module.HEADERS == {'Authorization': 'OAuth rotated'}
@@ -0,0 +1,162 @@
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+import requests
+
+from limiter import AdaptiveLimiter
+from utils import FakeClock, MockResponseGET, patch_settings
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+class TestAdaptiveLimiter:
+    def test_grows_additively_while_saturated(self):
+        limiter = AdaptiveLimiter(max_limit=3, clock=FakeClock())
+        limiter.release(limiter.acquire())
+        assert limiter.limit == 2
+        started = [limiter.acquire(), limiter.acquire()]
+        for start in started:
+            limiter.release(start)
+        assert limiter.limit == 2.5
+        for _ in range(10):
+            started = [limiter.acquire() for _ in range(limiter.capacity())]
+            for start in started:
+                limiter.release(start)
+        assert limiter.limit == 3
+
+    def test_does_not_grow_below_limit(self):
+        limiter = AdaptiveLimiter(max_limit=8, initial=4, clock=FakeClock())
+        for _ in range(10):
+            limiter.release(limiter.acquire())
+        assert limiter.limit == 4
+
+    def test_overload_cuts_limit_once_per_cooldown(self):
+        clock = FakeClock()
+        limiter = AdaptiveLimiter(
+            max_limit=16, initial=16, cooldown=1, clock=clock)
+        started = [limiter.acquire() for _ in range(3)]
+        for start in started:
+            limiter.release(start, overloaded=True)
+        assert limiter.limit == 8
+        clock.now += 1
+        limiter.release(limiter.acquire(), overloaded=True)
+        assert limiter.limit == 4
+        for _ in range(5):
+            clock.now += 1
+            limiter.release(limiter.acquire(), overloaded=True)
+        assert limiter.limit == 1
+
+    def test_latency_spike_counts_as_overload(self):
+        clock = FakeClock()
+        limiter = AdaptiveLimiter(
+            max_limit=8, initial=8, window=4, clock=clock)
+        for latency in (0.2, 0.2, 1, 1):
+            started = limiter.acquire()
+            clock.now += latency
+            limiter.release(started)
+        assert limiter.limit == 4
+
+    def test_single_slow_response_keeps_limit(self):
+        clock = FakeClock()
+        limiter = AdaptiveLimiter(max_limit=8, initial=8, clock=clock)
+        for latency in [0.1] * 20 + [5] + [0.1] * 20:
+            started = limiter.acquire()
+            clock.now += latency
+            limiter.release(started)
+        assert limiter.limit == 8
+
+    def test_recovers_after_permanent_latency_shift(self):
+        clock = FakeClock()
+        limiter = AdaptiveLimiter(max_limit=8, initial=8, clock=clock)
+        limits = []
+        for latency in [0.1] * 20 + [0.3] * 100:
+            started = [limiter.acquire() for _ in range(limiter.capacity())]
+            clock.now += latency
+            for start in started:
+                limiter.release(start)
+            limits.append(limiter.limit)
+        assert min(limits) < 8
+        assert limiter.limit == 8
+        assert limiter.baseline == pytest.approx(0.3)
+
+    def test_in_flight_never_exceeds_limit(self):
+        limiter = AdaptiveLimiter(max_limit=3, initial=3)
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def work():
+            started = limiter.acquire()
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.005)
+            with lock:
+                active.pop()
+            limiter.release(started)
+
+        threads = [threading.Thread(target=work) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert max(peak) <= 3
+        assert limiter.stats()['in_flight'] == 0
+
+    def test_waiting_tenants_admitted_round_robin(self):
+        limiter = AdaptiveLimiter(max_limit=1, clock=FakeClock())
+        held = limiter.acquire()
+        admitted = []
+
+        def work(key, name):
+            started = limiter.acquire(key)
+            admitted.append(name)
+            limiter.release(started)
+
+        threads = []
+        for number, (key, name) in enumerate(
+                [('a', 'a1'), ('a', 'a2'), ('b', 'b1')], 1):
+            thread = threading.Thread(target=work, args=(key, name))
+            thread.start()
+            threads.append(thread)
+            wait_until(lambda: limiter.stats()['queued'] == number)
+        limiter.release(held)
+        for thread in threads:
+            thread.join()
+        assert admitted == ['a1', 'b1', 'a2']
+
+
+def test_throttled_response_cuts_limit(monkeypatch, homework_module):
+    limiter = AdaptiveLimiter(max_limit=8, initial=8)
+    monkeypatch.setattr(homework_module, 'limiter', limiter)
+    monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: (
+        MockResponseGET(http_status=HTTPStatus.TOO_MANY_REQUESTS)))
+    with pytest.raises(ValueError):
+        homework_module.get_api_answer(0)
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+
+def test_tenants_polled_concurrently(monkeypatch, homework_module):
+    patch_settings(monkeypatch, homework_module, api_concurrency=3)
+    barrier = threading.Barrier(3, timeout=5)
+    polled = []
+
+    def poll_tenant(runtime, tenant, window):
+        barrier.wait()
+        polled.append(tenant.id)
+
+    monkeypatch.setattr(homework_module, 'poll_tenant', poll_tenant)
+    runtime = homework_module.Runtime(
+        None, None, None, None, None, None, None,
+        [homework_module.Tenant('token', chat_id) for chat_id in (1, 2, 3)],
+        {}, {}, None)
+    homework_module.poll_tenants(runtime, threading.Event())
+    assert sorted(polled) == ['1', '2', '3']
@@ -0,0 +1,55 @@
+import json
+import sys
+import tracemalloc
+
+from models import Homework
+
+API_HOMEWORK = {
+    'id': 123,
+    'status': 'approved',
+    'homework_name': 'username__hw_python_oop.zip',
+    'reviewer_comment': '',
+    'date_updated': '2020-02-13T14:40:57Z',
+    'lesson_name': 'Итоговый проект',
+}
+
+
+def retained_memory(body, convert):
+    tracemalloc.start()
+    try:
+        records = [convert(item) for item in json.loads(body)['homeworks']]
+        return tracemalloc.get_traced_memory()[0], records
+    finally:
+        tracemalloc.stop()
+
+
+class TestHomeworkRecord:
+    def test_from_api(self):
+        homework = Homework.from_api(API_HOMEWORK)
+        assert homework.astuple() == (
+            123, 'username__hw_python_oop.zip', 'approved', 1581604857, None)
+        assert not hasattr(homework, '__dict__')
+        assert homework == Homework.from_api(dict(API_HOMEWORK))
+        assert hash(homework) == hash(Homework.from_api(dict(API_HOMEWORK)))
+
+    def test_status_is_interned(self):
+        first, second = json.loads(json.dumps([API_HOMEWORK] * 2))
+        assert first['status'] is not second['status']
+        assert (Homework.from_api(first).status
+                is Homework.from_api(second).status)
+
+    def test_unparsable_date_is_kept(self):
+        homework = Homework.from_api(
+            dict(API_HOMEWORK, date_updated='вчера'))
+        assert homework.date_updated == 'вчера'
+
+    def test_memory_per_record(self):
+        body = json.dumps({'homeworks': [
+            dict(API_HOMEWORK, id=i, homework_name=f'user{i}__hw.zip')
+            for i in range(5000)
+        ]})
+        dicts_size, _ = retained_memory(body, lambda item: item)
+        records_size, _ = retained_memory(body, Homework.from_api)
+        assert dicts_size / records_size > 2
+        assert (sys.getsizeof(API_HOMEWORK)
+                / sys.getsizeof(Homework.from_api(API_HOMEWORK))) > 3
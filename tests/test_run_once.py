@@ -0,0 +1,40 @@
+import time
+
+import pytest
+
+from state import StateStore
+from utils import patch_settings
+
+
+@pytest.fixture
+def once(monkeypatch, tmp_path, polled, homework_module):
+    patch_settings(
+        monkeypatch, homework_module, state_db=str(tmp_path / 'db'),
+        batch_linger=0, bot_commands=False, retry_period=600)
+    return polled
+
+
+def test_run_once_polls_only_due_tenants(once, homework_module):
+    assert homework_module.run_once()
+    assert homework_module.run_once()
+    assert once == ['1', '2']
+    store = StateStore(homework_module.settings.state_db)
+    assert store.leases() == {}
+    store.set(homework_module.POLLED_NAMESPACE, '2', time.time() - 590)
+    store.close()
+    homework_module.run_once()
+    assert once == ['1', '2', '2']
+
+
+def test_run_once_skips_when_previous_run_holds_lease(once, homework_module):
+    store = StateStore(homework_module.settings.state_db)
+    store.acquire_lease(homework_module.RUN_ONCE_LEASE, 'other', 60)
+    store.close()
+    assert homework_module.run_once() is False
+    assert once == []
+
+
+def test_run_once_requires_state_store(once, monkeypatch, homework_module):
+    patch_settings(monkeypatch, homework_module, state_db=None)
+    with pytest.raises(ValueError):
+        homework_module.run_once()
@@ -0,0 +1,100 @@
+import threading
+
+from delivery import Entry, Outbox
+from scheduler import FairScheduler, Quota
+from utils import FakeClock, patch_settings
+
+
+class TestFairScheduler:
+    def test_noisy_key_goes_last(self):
+        scheduler = FairScheduler()
+        scheduler.charge('noisy', 30)
+        scheduler.charge('quiet', 1)
+        assert scheduler.order(['noisy', 'quiet', 'new']) == [
+            'new', 'quiet', 'noisy']
+        for _ in range(10):
+            scheduler.charge('quiet', 1)
+        assert scheduler.order(['noisy', 'quiet'])[0] == 'quiet'
+        for _ in range(20):
+            scheduler.charge('quiet', 1)
+        assert scheduler.order(['quiet', 'noisy'])[0] == 'noisy'
+
+    def test_weight_scales_cost(self):
+        scheduler = FairScheduler()
+        scheduler.charge('heavy', 10, weight=10)
+        scheduler.charge('light', 2)
+        assert scheduler.order(['light', 'heavy']) == ['heavy', 'light']
+
+    def test_idle_key_gets_no_credit(self):
+        scheduler = FairScheduler()
+        for _ in range(5):
+            scheduler.charge('busy', 10)
+        assert scheduler.tag('idle') == scheduler.tag('busy') - 10
+
+    def test_priority_first(self):
+        scheduler = FairScheduler()
+        scheduler.charge('urgent', 100)
+        assert scheduler.order(
+            ['normal', 'urgent'],
+            priority=lambda key: 0 if key == 'urgent' else 1) == [
+                'urgent', 'normal']
+
+
+class TestQuota:
+    def test_limit_and_refill(self):
+        clock = FakeClock()
+        quota = Quota(limit=4, period=3600, clock=clock)
+        assert quota.take('a', 3) == 3
+        assert quota.take('a', 3) == 1
+        assert quota.take('a') == 0
+        assert quota.take('b') == 1
+        assert quota.wait('a') == 900
+        clock.now += 900
+        assert quota.take('a') == 1
+
+    def test_unlimited(self):
+        quota = Quota()
+        assert quota.take('a', 1000) == 1000
+        assert quota.wait('a') == 0
+
+
+def test_outbox_fair_order_and_quota():
+    clock = FakeClock()
+    sent = []
+    scheduler = FairScheduler()
+    scheduler.charge('noisy', 50)
+    outbox = Outbox(
+        lambda chat_id, entries: sent.append((chat_id, len(entries)))
+        or len(entries), linger=0, max_batch=10, scheduler=scheduler,
+        quota=Quota(limit=2, clock=clock), clock=clock)
+    for number in range(5):
+        outbox.put(Entry('noisy', ('noisy', number), 'text', None, None))
+    outbox.put(Entry('quiet', ('quiet', 0), 'text', None, None))
+    outbox.flush()
+    assert sent == [('quiet', 1), ('noisy', 2)]
+    assert outbox.depth() == 3
+    assert outbox.flush() == 0
+    clock.now += 1800
+    assert outbox.flush() == 1
+
+
+def test_poll_order_priority_and_quota(monkeypatch, homework_module):
+    scheduler = FairScheduler()
+    scheduler.charge('1', 60)
+    monkeypatch.setattr(homework_module, 'poll_scheduler', scheduler)
+    monkeypatch.setattr(homework_module, 'poll_quota', Quota(limit=1))
+    patch_settings(monkeypatch, homework_module, api_concurrency=1)
+    polled = []
+    monkeypatch.setattr(
+        homework_module, 'poll_tenant',
+        lambda runtime, tenant, window: polled.append(tenant.id))
+    board = homework_module.StatusBoard(lambda homework, locale: '')
+    board.update(3, homework_module.Homework(1, 'hw', 'reviewing'))
+    runtime = homework_module.Runtime(
+        None, None, None, board, None, None, None,
+        [homework_module.Tenant('token', chat_id) for chat_id in (1, 2, 3)],
+        {}, {}, None)
+    homework_module.poll_tenants(runtime, threading.Event())
+    assert polled == ['3', '2', '1']
+    homework_module.poll_tenants(runtime, threading.Event())
+    assert polled == ['3', '2', '1']
@@ -0,0 +1,36 @@
+import pytest
+
+from settings import Settings
+
+
+def test_defaults():
+    settings = Settings.from_env({})
+    assert settings.retry_period == 600
+    assert settings.health_busy_timeout == 60
+    assert settings.health_ready_timeout == 1800
+    assert settings.state_db is None
+    assert settings.edit_messages is False
+
+
+def test_parsed_values():
+    settings = Settings.from_env({
+        'RETRY_PERIOD': '5', 'REQUEST_TIMEOUT': '10', 'EDIT_MESSAGES': 'Yes',
+        'BATCH_LINGER': '0.5', 'STATE_DB': 'state.db'})
+    assert settings.retry_period == 5
+    assert settings.health_busy_timeout == 20
+    assert settings.health_ready_timeout == 15
+    assert settings.edit_messages is True
+    assert settings.batch_linger == 0.5
+    assert settings.state_db == 'state.db'
+
+
+def test_immutable():
+    settings = Settings.from_env({})
+    with pytest.raises(AttributeError):
+        settings.retry_period = 1
+    assert settings._replace(retry_period=1).retry_period == 1
+
+
+def test_invalid_number():
+    with pytest.raises(ValueError):
+        Settings.from_env({'RETRY_PERIOD': 'often'})
@@ -0,0 +1,118 @@
+import threading
+from types import SimpleNamespace
+
+from sharding import HashRing, ShardCoordinator
+from state import StateStore
+from utils import FakeClock, make_runtime
+
+
+def coordinators(store, *workers):
+    return [ShardCoordinator(store, worker, shards=64, lease_period=60)
+            for worker in workers]
+
+
+class TestHashRing:
+    def test_minimal_reshuffle(self):
+        keys = range(10000)
+        before = HashRing(['a', 'b', 'c'])
+        after = HashRing(['a', 'b', 'c', 'd'])
+        moved = [key for key in keys if before.owner(key) != after.owner(key)]
+        assert all(after.owner(key) == 'd' for key in moved)
+        assert len(moved) < len(keys) * 0.4
+
+    def test_empty_ring(self):
+        assert HashRing([]).owner('key') is None
+
+
+class TestShardCoordinator:
+    def test_workers_split_shards(self):
+        store = StateStore(clock=FakeClock())
+        first, second = coordinators(store, 'a', 'b')
+        first.refresh()
+        assert len(first.owned) == 64
+        second.refresh()
+        first.refresh()
+        second.refresh()
+        assert not first.owned & second.owned
+        assert first.owned | second.owned == set(range(64))
+        assert 0 < len(second.owned) < 64
+
+    def test_tenant_owned_by_exactly_one_worker(self):
+        store = StateStore(clock=FakeClock())
+        workers = coordinators(store, 'a', 'b', 'c')
+        for _ in range(2):
+            for worker in workers:
+                worker.refresh()
+        for tenant in map(str, range(100)):
+            assert sum(worker.owns(tenant) for worker in workers) == 1
+
+    def test_crashed_worker_shards_taken_over(self):
+        clock = FakeClock()
+        store = StateStore(clock=clock)
+        first, second = coordinators(store, 'a', 'b')
+        for worker in (first, second, first, second):
+            worker.refresh()
+        clock.now += 30
+        first.refresh()
+        assert len(first.owned) < 64
+        clock.now += 31
+        first.refresh()
+        assert len(first.owned) == 64
+
+    def test_stop_releases_leases(self):
+        store = StateStore(clock=FakeClock())
+        first, second = coordinators(store, 'a', 'b')
+        first.start()
+        first.stop()
+        second.refresh()
+        assert len(second.owned) == 64
+
+    def test_change_reported_before_shards_are_used(self):
+        clock = FakeClock()
+        store = StateStore(clock=clock)
+        changes = []
+        first, second = coordinators(store, 'a', 'b')
+        first.on_change = lambda shards: changes.append(
+            (set(shards), first.owned))
+        first.refresh()
+        [(gained, before)] = changes
+        assert len(gained) == 64 and before == frozenset()
+        second.refresh()
+        first.refresh()
+        lost, before = changes[-1]
+        assert lost and lost <= before and not lost & first.owned
+
+
+def test_returned_shard_rereads_store(homework_module):
+    store = StateStore()
+    tenant = homework_module.Tenant('token', 1)
+    runtime = make_runtime(homework_module, None, store)._replace(
+        dedup=homework_module.DedupIndex(store=store),
+        board=homework_module.StatusBoard(lambda homework, locale: ''),
+        coordinator=SimpleNamespace(shard_of=lambda tenant_id: 0))
+    runtime.tenants.append(tenant)
+    runtime.dedup.remember(1, 10, 'reviewing', 1)
+    runtime.windows['1'] = homework_module.PollWindow('1', store=store)
+    other = homework_module.DedupIndex(store=store)
+    other.remember(1, 10, 'reviewing', 3)
+    assert runtime.dedup.is_new(1, 10, 'reviewing', 3)
+    homework_module.forget_shards(runtime, {0})
+    assert not runtime.dedup.is_new(1, 10, 'reviewing', 3)
+    assert '1' not in runtime.windows
+
+
+def test_shard_lost_mid_cycle_not_polled(monkeypatch, homework_module):
+    owned = {'1', '2'}
+    polled = []
+
+    def poll_tenant(runtime, tenant, window):
+        polled.append(tenant.id)
+        owned.clear()
+
+    monkeypatch.setattr(homework_module, 'poll_tenant', poll_tenant)
+    runtime = make_runtime(homework_module, None)._replace(
+        coordinator=SimpleNamespace(owns=lambda tenant_id: tenant_id in owned))
+    runtime.tenants.extend(
+        homework_module.Tenant('token', chat_id) for chat_id in (1, 2))
+    homework_module.poll_tenants(runtime, threading.Event())
+    assert len(polled) == 1
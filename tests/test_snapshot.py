@@ -0,0 +1,113 @@
+import threading
+
+from scheduler import FairScheduler
+from snapshot import REVIEWING, Record, Snapshot, write_snapshot
+from state import StateStore
+from utils import patch_settings
+
+
+class FailingStore:
+    def get(self, namespace, key, default=None):
+        raise AssertionError(f'store read for {key}')
+
+
+def test_snapshot_roundtrip(tmp_path):
+    path = str(tmp_path / 'state.snapshot')
+    write_snapshot(path, [
+        ('b', Record(2000, 150.0, 3.5, REVIEWING)),
+        ('a', Record(None, None, 1.0, 0))], virtual_time=2.0, written=300.0)
+    snapshot = Snapshot.open(path)
+    assert len(snapshot) == 2
+    assert (snapshot.virtual_time, snapshot.written) == (2.0, 300.0)
+    assert snapshot.get('a') == Record(None, None, 1.0, 0)
+    assert snapshot.get('b') == Record(2000, 150.0, 3.5, REVIEWING)
+    assert snapshot.get('c') is None
+    snapshot.close()
+    assert snapshot.get('a') is None
+
+
+def test_missing_or_corrupt_snapshot_is_empty(tmp_path):
+    path = tmp_path / 'state.snapshot'
+    assert len(Snapshot.open(str(path))) == 0
+    path.write_bytes(b'garbage')
+    assert len(Snapshot.open(str(path))) == 0
+    path.write_bytes(b'')
+    assert Snapshot.open(str(path)).get('a') is None
+
+
+def test_scheduler_restores_tags_lazily():
+    loaded = []
+
+    def saved(key):
+        loaded.append(key)
+        return {'noisy': 40.0}.get(key)
+
+    scheduler = FairScheduler()
+    scheduler.restore(10.0, saved)
+    assert scheduler.order(['noisy', 'quiet']) == ['quiet', 'noisy']
+    assert sorted(loaded) == ['noisy', 'quiet']
+    scheduler.charge('quiet', 1)
+    assert scheduler.tag('quiet') == 11.0
+    assert loaded.count('quiet') == 1
+
+
+def test_due_tenants_read_snapshot_not_store(
+        monkeypatch, tmp_path, homework_module):
+    patch_settings(monkeypatch, homework_module, retry_period=600)
+    path = str(tmp_path / 'state.snapshot')
+    write_snapshot(path, [
+        ('1', Record(None, 1000.0, 0.0, 0)),
+        ('2', Record(None, 1500.0, 0.0, 0))])
+    runtime = homework_module.Runtime(
+        None, FailingStore(), None, None, None, None, None,
+        [homework_module.Tenant('token', chat_id) for chat_id in (1, 2)],
+        {}, {}, None, None, Snapshot.open(path))
+    due = homework_module.due_tenants(runtime, now=1700)
+    assert next(due).id == '1'
+    assert list(due) == []
+
+
+def test_priority_and_cursor_from_snapshot(
+        monkeypatch, tmp_path, homework_module):
+    monkeypatch.setattr(homework_module, 'poll_scheduler', FairScheduler())
+    patch_settings(monkeypatch, homework_module, api_concurrency=1)
+    windows = []
+    monkeypatch.setattr(
+        homework_module, 'poll_tenant',
+        lambda runtime, tenant, window: windows.append(
+            (tenant.id, window.cursor)))
+    path = str(tmp_path / 'state.snapshot')
+    write_snapshot(path, [('2', Record(5000, 100.0, 0.0, REVIEWING))])
+    runtime = homework_module.Runtime(
+        None, FailingStore(), None,
+        homework_module.StatusBoard(lambda homework, locale: ''), None, None,
+        None, [homework_module.Tenant('token', chat_id) for chat_id in (1, 2)],
+        {}, {}, None, None, Snapshot.open(path))
+    runtime.windows['1'] = homework_module.PollWindow('1', cursor=7000)
+    homework_module.poll_tenants(runtime, threading.Event())
+    assert windows == [('2', 5000), ('1', 7000)]
+
+
+def test_run_once_saves_and_uses_snapshot(
+        monkeypatch, tmp_path, polled, homework_module):
+    patch_settings(
+        monkeypatch, homework_module, state_db=str(tmp_path / 'db'),
+        batch_linger=0, bot_commands=False, retry_period=600)
+
+    def poll_tenant(runtime, tenant, window):
+        polled.append(tenant.id)
+        window.advance(4_000_000_000)
+
+    monkeypatch.setattr(homework_module, 'poll_tenant', poll_tenant)
+    assert homework_module.run_once()
+    snapshot = Snapshot.open(str(tmp_path / 'db') + '.snapshot')
+    assert len(snapshot) == 2
+    assert snapshot.get('1').cursor == 4_000_000_000
+    assert snapshot.get('2').polled is not None
+    snapshot.close()
+    store = StateStore(homework_module.settings.state_db)
+    store.delete(homework_module.POLLED_NAMESPACE, '1')
+    store.delete(homework_module.POLLED_NAMESPACE, '2')
+    store.close()
+    assert homework_module.run_once()
+    assert polled == ['1', '2']
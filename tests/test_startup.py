@@ -0,0 +1,19 @@
+import json
+
+import benchmark
+from lazy import LazyModule
+
+
+def test_lazy_module_delegates_to_real_module(monkeypatch):
+    lazy = LazyModule('json')
+    assert lazy.dumps([1]) == '[1]'
+    monkeypatch.setattr(lazy, 'dumps', lambda value: 'patched')
+    assert json.dumps([1]) == 'patched'
+
+
+def test_heavy_modules_loaded_lazily():
+    assert benchmark.probe()['loaded_on_import'] == []
+
+
+def test_startup_budget():
+    assert benchmark.over_budget(benchmark.measure(runs=3)) == []
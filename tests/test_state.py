@@ -0,0 +1,34 @@
+from state import StateStore
+from utils import FakeClock
+
+
+class TestStateStore:
+    def test_get_set_delete(self):
+        store = StateStore()
+        assert store.get('ns', 'key', 'default') == 'default'
+        store.set('ns', 'key', {'a': [1, 2]})
+        assert store.get('ns', 'key') == {'a': [1, 2]}
+        assert store.get('other', 'key') is None
+        store.delete('ns', 'key')
+        assert store.get('ns', 'key') is None
+
+    def test_items_and_set_many(self):
+        store = StateStore()
+        store.set_many('ns', [('a', 1), ('b', 2)])
+        assert sorted(store.items('ns')) == [('a', 1), ('b', 2)]
+
+    def test_expiry_and_purge(self):
+        clock = FakeClock()
+        store = StateStore(clock=clock)
+        store.set('ns', 'key', 1, expires=clock.now + 10)
+        assert store.get('ns', 'key') == 1
+        clock.now += 10
+        assert store.get('ns', 'key') is None
+        assert store.items('ns') == []
+        store.purge()
+        assert store.execute('SELECT COUNT(*) FROM state') == [(0,)]
+
+    def test_shared_file(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        StateStore(path).set('ns', 'key', 'value')
+        assert StateStore(path).get('ns', 'key') == 'value'
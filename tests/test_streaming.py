@@ -0,0 +1,120 @@
+import json
+from http import HTTPStatus
+
+import pytest
+import requests
+
+from models import Homework
+from streaming import ArrayStream, iter_text
+from utils import patch_settings
+
+
+def split(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class MockStreamResponse:
+    def __init__(self, data, chunk_size=7):
+        self.status_code = HTTPStatus.OK
+        self.encoding = None
+        self.closed = False
+        self.body = json.dumps(data, ensure_ascii=False).encode()
+        self.chunk_size = chunk_size
+
+    def iter_content(self, chunk_size=None):
+        return split(self.body, self.chunk_size)
+
+    def close(self):
+        self.closed = True
+
+
+class TestArrayStream:
+    DATA = {
+        'homeworks': [
+            {
+                'id': 124,
+                'status': 'rejected',
+                'homework_name': 'username__hw_python_oop.zip',
+                'reviewer_comment': 'Скобки [в комментарии], "кавычки" и {}',
+                'date_updated': '2020-02-13T14:40:57Z',
+            },
+            {'id': 123, 'status': 'approved', 'homework_name': 'hw',
+             'score': 1.25e3},
+        ],
+        'current_date': 1581604970,
+    }
+
+    @pytest.mark.parametrize('size', [1, 2, 3, 5, 64, 100000])
+    def test_items_and_fields(self, size):
+        stream = ArrayStream(split(json.dumps(self.DATA), size), 'homeworks')
+        assert list(stream) == self.DATA['homeworks']
+        assert stream.found
+        assert stream.fields == {'current_date': 1581604970}
+
+    def test_empty_array_and_object(self):
+        stream = ArrayStream(['{"homeworks": [ ], "current_date": 1}'],
+                             'homeworks')
+        assert list(stream) == []
+        assert stream.fields == {'current_date': 1}
+        stream = ArrayStream([' {} '], 'homeworks')
+        assert list(stream) == []
+        assert not stream.found
+
+    def test_key_with_not_list_value(self):
+        stream = ArrayStream(split('{"homeworks": {"a": 1}}', 4), 'homeworks')
+        assert list(stream) == []
+        assert not stream.found
+        assert stream.fields == {'homeworks': {'a': 1}}
+
+    @pytest.mark.parametrize('text, error', [
+        ('[{"homeworks": []}]', TypeError),
+        ('{"homeworks": [{"id": 1}', ValueError),
+        ('{"homeworks": [{"id": 1} {"id": 2}]}', ValueError),
+        ('', ValueError),
+    ])
+    def test_invalid(self, text, error):
+        with pytest.raises(error):
+            list(ArrayStream(split(text, 3), 'homeworks'))
+
+    def test_buffer_stays_bounded(self):
+        item = {'id': 1, 'status': 'approved', 'homework_name': 'x' * 100}
+        chunks = iter(split(
+            json.dumps({'homeworks': [item] * 5000, 'current_date': 1}), 512))
+        stream = ArrayStream(chunks, 'homeworks')
+        peak = 0
+        for _ in stream:
+            peak = max(peak, len(stream._buffer))
+        assert peak < 1024
+
+    def test_iter_text_decodes_split_characters(self):
+        response = MockStreamResponse(self.DATA, chunk_size=1)
+        assert json.loads(''.join(iter_text(response))) == self.DATA
+
+
+def test_get_homeworks_streaming(monkeypatch, homework_module):
+    response = MockStreamResponse(TestArrayStream.DATA)
+    monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: response)
+    patch_settings(monkeypatch, homework_module, stream_responses=True)
+    homeworks, fields = homework_module.get_homeworks(0)
+    assert list(homeworks) == [
+        Homework.from_api(homework)
+        for homework in TestArrayStream.DATA['homeworks']]
+    assert fields['current_date'] == TestArrayStream.DATA['current_date']
+    assert response.closed
+
+
+@pytest.mark.parametrize('data, error', [
+    ({'current_date': 1}, KeyError),
+    ({'homeworks': {'id': 1}}, TypeError),
+    ({'homeworks': [1]}, TypeError),
+    ({'homeworks': [{'status': 'approved'}]}, KeyError),
+    ({'homeworks': [], 'code': 'not_authenticated'}, ValueError),
+])
+def test_get_homeworks_streaming_invalid(monkeypatch, data, error,
+                                         homework_module):
+    response = MockStreamResponse(data)
+    monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: response)
+    patch_settings(monkeypatch, homework_module, stream_responses=True)
+    homeworks, _ = homework_module.get_homeworks(0)
+    with pytest.raises(error):
+        list(homeworks)
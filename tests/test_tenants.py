@@ -0,0 +1,73 @@
+import json
+from http import HTTPStatus
+
+import pytest
+import requests
+
+from tenants import Tenant, load_tenants
+from utils import MockResponseGET, patch_settings
+
+
+def test_load_tenants(tmp_path):
+    path = tmp_path / 'tenants.json'
+    path.write_text(json.dumps([
+        {'practicum_token': 'a', 'chat_id': 1},
+        {'practicum_token': 'b', 'chat_id': 2, 'locale': 'en', 'id': 'x'},
+    ]))
+    first, second = load_tenants(str(path), None)
+    assert (first.id, first.headers) == ('1', {'Authorization': 'OAuth a'})
+    assert (second.id, second.chat_id, second.locale) == ('x', 2, 'en')
+
+
+def test_default_tenant():
+    default = Tenant('token', '12345')
+    assert load_tenants(None, default) == [default]
+
+
+@pytest.mark.parametrize('get', [
+    lambda **kwargs: MockResponseGET(
+        http_status=HTTPStatus.INTERNAL_SERVER_ERROR),
+    lambda **kwargs: type('Response', (MockResponseGET,), {
+        'json': lambda self: {'error': 'failure'}})(),
+    lambda **kwargs: (_ for _ in ()).throw(requests.ConnectionError()),
+])
+def test_api_errors_hide_tenant_token(monkeypatch, homework_module, get):
+    monkeypatch.setattr(requests, 'get', get)
+    with pytest.raises(Exception) as error:
+        homework_module.get_homeworks(
+            0, Tenant('secret-token', 1).headers)
+    assert 'secret-token' not in str(error.value)
+
+
+def test_main_polls_every_tenant(monkeypatch, tmp_path, offline_main,
+                                 homework_module):
+    path = tmp_path / 'tenants.json'
+    path.write_text(json.dumps([
+        {'practicum_token': 'a', 'chat_id': 1},
+        {'practicum_token': 'b', 'chat_id': 2},
+    ]))
+    requested = []
+    sent = []
+
+    class Stop(Exception):
+        pass
+
+    def get_homeworks(timestamp, headers=None):
+        requested.append(headers['Authorization'])
+        return [homework_module.Homework(1, 'hw', 'approved', 100)], {}
+
+    def sleep(seconds):
+        raise Stop
+
+    patch_settings(monkeypatch, homework_module, tenants_file=str(path))
+    monkeypatch.setattr(homework_module, 'get_homeworks', get_homeworks)
+    monkeypatch.setattr(
+        homework_module, 'send_to_chat',
+        lambda bot, chat_id, message: sent.append(chat_id) or True)
+    monkeypatch.setattr(homework_module.time, 'sleep', sleep)
+    try:
+        homework_module.main()
+    except Stop:
+        pass
+    assert requested == ['OAuth a', 'OAuth b']
+    assert sent == [1, 2]
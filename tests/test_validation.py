@@ -0,0 +1,219 @@
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+import requests
+import telegram
+
+from scheduler import FairScheduler
+from state import StateStore
+from utils import FakeBot, FakeClock, MockResponseGET, patch_settings
+from validation import (
+    BackgroundCheck, InvalidCredentials, Quarantine, validate)
+
+
+class Tenant:
+    def __init__(self, id):
+        self.id = id
+
+
+def test_validate_sorts_results_with_bounded_pool():
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def probe(tenant):
+        with lock:
+            active.append(tenant.id)
+            peak.append(len(active))
+        time.sleep(0.01)
+        with lock:
+            active.remove(tenant.id)
+        if tenant.id.startswith('bad'):
+            raise InvalidCredentials('rejected')
+        if tenant.id.startswith('down'):
+            raise ConnectionError('timeout')
+
+    tenants = [Tenant(name) for name in (
+        'ok1', 'ok2', 'bad1', 'down1', 'ok3', 'bad2')]
+    valid, invalid, unknown = validate(tenants, probe, workers=2)
+    assert sorted(valid) == ['ok1', 'ok2', 'ok3']
+    assert invalid == {'bad1': 'rejected', 'bad2': 'rejected'}
+    assert unknown == {'down1': 'timeout'}
+    assert max(peak) == 2
+    assert validate([], probe) == ([], {}, {})
+
+
+def test_background_check_repeats_request_made_while_running():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def check(name):
+        calls.append(name)
+        started.set()
+        release.wait(5)
+
+    background = BackgroundCheck(check)
+    background.request('first')
+    started.wait(5)
+    assert background.running
+    background.request('second')
+    background.request('third')
+    release.set()
+    background.join(5)
+    background.join(5)
+    assert calls == ['first', 'third']
+    assert not background.running
+
+
+def test_quarantine_persisted_and_due():
+    store = StateStore()
+    clock = FakeClock()
+    quarantine = Quarantine(store, clock=clock)
+    assert quarantine.due(60)
+    quarantine.add('1', 'rejected')
+    quarantine.mark_checked()
+    restored = Quarantine(store, clock=clock)
+    assert '1' in restored and len(restored) == 1
+    assert not restored.due(60)
+    assert not restored.due(0)
+    clock.now += 60
+    assert restored.due(60)
+    restored.discard('1')
+    assert '1' not in Quarantine(store)
+
+
+class CheckedBot(FakeBot):
+    def __init__(self, missing_chats=(), token_valid=True):
+        super().__init__()
+        self.missing_chats = missing_chats
+        self.token_valid = token_valid
+
+    def get_me(self):
+        if not self.token_valid:
+            raise telegram.error.Unauthorized('Unauthorized')
+
+    def get_chat(self, chat_id):
+        if chat_id in self.missing_chats:
+            raise telegram.error.BadRequest('Chat not found')
+
+
+@pytest.fixture
+def runtime(monkeypatch, homework_module):
+    def get(url, headers=None, **kwargs):
+        status = (HTTPStatus.UNAUTHORIZED if headers['Authorization']
+                  == 'OAuth expired' else HTTPStatus.OK)
+        return MockResponseGET(http_status=status)
+
+    monkeypatch.setattr(requests, 'get', get)
+    monkeypatch.setattr(homework_module, 'poll_scheduler', FairScheduler())
+    tenants = [
+        homework_module.Tenant('token', 1),
+        homework_module.Tenant('expired', 2),
+        homework_module.Tenant('token', 3),
+    ]
+    runtime = homework_module.Runtime(
+        CheckedBot(missing_chats=(3,)), None, None, None, None, None, None,
+        tenants, {}, {}, None, Quarantine())
+    return runtime
+
+
+def test_invalid_tenants_quarantined_and_skipped(monkeypatch, runtime,
+                                                 homework_module):
+    homework_module.validate_tenants(runtime)
+    assert sorted(runtime.quarantine.reasons) == ['2', '3']
+    [(chat_id, summary)] = runtime.bot.sent
+    assert chat_id == homework_module.TELEGRAM_CHAT_ID
+    assert '2: ' in summary and '3: ' in summary
+    homework_module.validate_tenants(runtime)
+    assert len(runtime.bot.sent) == 1
+
+    polled = []
+    monkeypatch.setattr(
+        homework_module, 'poll_tenant',
+        lambda runtime, tenant, window: polled.append(tenant.id))
+    homework_module.poll_tenants(runtime, threading.Event())
+    assert polled == ['1']
+
+    runtime.bot.missing_chats = ()
+    homework_module.validate_tenants(runtime)
+    assert list(runtime.quarantine.reasons) == ['2']
+
+
+def test_rejected_bot_token_stops_bot(runtime, homework_module):
+    runtime.bot.token_valid = False
+    with pytest.raises(ValueError):
+        homework_module.validate_tenants(runtime)
+
+
+def test_probes_share_limiter_under_own_key(monkeypatch, runtime,
+                                            homework_module):
+    keys = []
+
+    class RecordingLimiter:
+        def acquire(self, key):
+            keys.append(key)
+
+        def release(self, started, overloaded=False):
+            pass
+
+    monkeypatch.setattr(homework_module, 'limiter', RecordingLimiter())
+    homework_module.validate_tenants(runtime)
+    assert keys == [homework_module.PROBE_KEY] * 3
+    assert sorted(runtime.quarantine.reasons) == ['2', '3']
+
+
+def test_run_once_checks_each_tenant_before_its_poll(
+        monkeypatch, tmp_path, polled, homework_module):
+    patch_settings(
+        monkeypatch, homework_module, state_db=str(tmp_path / 'db'),
+        batch_linger=0, bot_commands=False, token_check=True)
+    summaries = []
+
+    def probe_tenant(bot, tenant):
+        polled.append(f'probe {tenant.id}')
+        if tenant.id == '2':
+            raise InvalidCredentials('rejected')
+
+    monkeypatch.setattr(homework_module, 'check_bot', lambda bot: None)
+    monkeypatch.setattr(homework_module, 'probe_tenant', probe_tenant)
+    monkeypatch.setattr(homework_module, 'send_message',
+                        lambda bot, message: summaries.append(message))
+    assert homework_module.run_once()
+    assert polled == ['probe 1', '1', 'probe 2']
+    assert len(summaries) == 1
+    assert not Quarantine(StateStore(
+        homework_module.settings.state_db)).due(60)
+
+
+def test_main_polls_without_waiting_for_validation(
+        monkeypatch, offline_main, homework_module):
+    release = threading.Event()
+    polled = []
+
+    class Stop(Exception):
+        pass
+
+    def sleep(seconds):
+        raise Stop
+
+    def validate_tenants(runtime):
+        release.wait(5)
+
+    patch_settings(
+        monkeypatch, homework_module, token_check=True, tenants_file=None)
+    monkeypatch.setattr(homework_module, 'check_bot', lambda bot: None)
+    monkeypatch.setattr(homework_module, 'validate_tenants', validate_tenants)
+    monkeypatch.setattr(homework_module, 'tenant_check', BackgroundCheck(
+        lambda runtime: homework_module.validate_tenants(runtime)))
+    monkeypatch.setattr(
+        homework_module, 'poll_tenant',
+        lambda runtime, tenant, window: polled.append(tenant.id))
+    monkeypatch.setattr(homework_module.time, 'sleep', sleep)
+    with pytest.raises(Stop):
+        homework_module.main()
+    assert polled and homework_module.tenant_check.running
+    release.set()
+    homework_module.tenant_check.join(5)
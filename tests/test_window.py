@@ -0,0 +1,104 @@
+import pytest
+
+from state import StateStore
+from utils import FakeBot, FakeClock, make_runtime
+from window import PollWindow
+
+
+class TestPollWindow:
+    def test_advances_without_deliveries(self):
+        window = PollWindow('chat', overlap=60, clock=FakeClock(1000))
+        assert window.from_date == 940
+        window.advance(1600)
+        window.advance(2200)
+        assert window.from_date == 2140
+
+    def test_never_moves_back(self):
+        window = PollWindow('chat', overlap=0, clock=FakeClock(1000))
+        window.advance(900)
+        assert window.cursor == 1000
+
+    def test_missing_current_date_uses_clock(self):
+        clock = FakeClock(1000)
+        window = PollWindow('chat', overlap=0, clock=clock)
+        clock.now = 1500
+        window.advance(None)
+        assert window.cursor == 1500
+
+    def test_undelivered_transition_holds_cursor(self):
+        window = PollWindow('chat', overlap=10, clock=FakeClock(1000))
+        window.advance(2000, pending=[1500])
+        assert window.from_date == 1490
+        window.advance(2600)
+        assert window.cursor == 2600
+
+    def test_pending_without_date_does_not_freeze(self):
+        window = PollWindow('chat', overlap=0, clock=FakeClock(1000))
+        window.advance(2000, pending=[None, '2020-13-01', 1500])
+        assert window.cursor == 1500
+        window.advance(2600, pending=[None])
+        assert window.cursor == 2600
+
+    def test_persisted_cursor(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        PollWindow('chat', store=StateStore(path),
+                   clock=FakeClock(1000)).advance(5000)
+        window = PollWindow('chat', overlap=0, store=StateStore(path),
+                            clock=FakeClock(9000))
+        assert window.from_date == 5000
+
+
+def test_unknown_status_does_not_block_other_homeworks(
+        monkeypatch, homework_module):
+    monkeypatch.setattr(homework_module, 'get_homeworks', lambda *args: ([
+        homework_module.Homework(1, 'paused', 'on_hold', 1500),
+        homework_module.Homework(2, 'done', 'approved', 1800),
+    ], {'current_date': 2000}))
+    bot = FakeBot()
+    runtime = make_runtime(homework_module, bot)._replace(
+        board=homework_module.StatusBoard(homework_module.render_status))
+    window = runtime.windows['1'] = PollWindow(
+        '1', overlap=0, clock=FakeClock(1000))
+    homework_module.poll_tenant(
+        runtime, homework_module.Tenant('token', 1), window)
+    assert [text for _, text in bot.sent][-1].startswith(
+        'Изменился статус проверки работы "done"')
+    assert any('on_hold' in text for _, text in bot.sent)
+    assert window.cursor == 2000
+    assert runtime.board.reply(1, '/status').startswith(
+        'Изменился статус проверки работы "done"')
+
+
+def test_first_poll_fills_board_without_notifying_history(
+        monkeypatch, homework_module):
+    requested = []
+    answers = [ValueError('API недоступен'), ([
+        homework_module.Homework(1, 'old', 'approved', 100),
+        homework_module.Homework(2, 'new', 'reviewing', 990),
+    ], {'current_date': 1000}), ([], {'current_date': 1100})]
+
+    def get_homeworks(timestamp, headers=None):
+        requested.append(timestamp)
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(homework_module, 'get_homeworks', get_homeworks)
+    monkeypatch.setattr(homework_module.time, 'time', lambda: 1000)
+    bot = FakeBot()
+    runtime = make_runtime(homework_module, bot)._replace(
+        board=homework_module.StatusBoard(homework_module.render_status),
+        commands=object())
+    tenant = homework_module.Tenant('token', 1)
+    window = PollWindow('1', overlap=60, clock=FakeClock(1000))
+    horizon = 1000 - homework_module.BACKFILL_PERIOD
+    with pytest.raises(ValueError):
+        homework_module.poll_tenant(runtime, tenant, window)
+    homework_module.poll_tenant(runtime, tenant, window)
+    homework_module.poll_tenant(runtime, tenant, window)
+    assert requested == [max(0, horizon)] * 2 + [940]
+    assert [text for _, text in bot.sent] == [
+        homework_module.render_status(
+            homework_module.Homework(2, 'new', 'reviewing', 990), None)]
+    assert 'old' in runtime.board.reply(1, '/status')
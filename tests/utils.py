@@ -5,6 +5,10 @@ from http import HTTPStatus
 from inspect import signature
 from types import ModuleType
 
+import telegram
+
+from delivery import LiveMessages
+
 
 def check_function(scope: ModuleType, func_name: str, params_qty: int = 0):
     """If scope has a function with specific name and params with qty."""
@@ -103,3 +107,47 @@ class MockTelegramBot:
 
 class BreakInfiniteLoop(Exception):
     pass
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def patch_settings(monkeypatch, module, **changes):
+    """Подменяет поля неизменяемых настроек бота на время теста."""
+    monkeypatch.setattr(
+        module, 'settings', module.settings._replace(**changes))
+
+
+class FakeBot:
+    def __init__(self, fail_edits=None, updates=()):
+        self.sent = []
+        self.edited = []
+        self.fail_edits = fail_edits
+        self.updates = list(updates)
+        self.calls = []
+
+    def send_message(self, chat_id, text):
+        self.sent.append((chat_id, text))
+        return telegram.Message(
+            len(self.sent), None, telegram.Chat(chat_id, 'private'))
+
+    def edit_message_text(self, text, chat_id=None, message_id=None):
+        if self.fail_edits:
+            raise telegram.error.BadRequest(self.fail_edits)
+        self.edited.append((chat_id, message_id, text))
+
+    def get_updates(self, offset=None, **kwargs):
+        self.calls.append(offset)
+        updates, self.updates = self.updates, []
+        return updates
+
+
+def make_runtime(homework_module, bot, store=None, outbox=None):
+    return homework_module.Runtime(
+        bot, store, homework_module.DedupIndex(), None, LiveMessages(store),
+        outbox, None, [], {}, {}, None)
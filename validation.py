@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+WORKERS = 8
+NAMESPACE = 'quarantine'
+CHECKED_KEY = 'quarantine:checked'
+
+CHECK_FAILED = 'Фоновая проверка арендаторов не удалась: {error}'
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidCredentials(Exception):
+    """Токен Практикума или чат арендатора недействительны."""
+
+
+def validate(tenants, probe, workers=WORKERS):
+    """Проверяет арендаторов параллельно, не больше ``workers`` сразу.
+
+    ``probe(tenant)`` бросает InvalidCredentials для недействительных
+    данных; любая другая ошибка значит, что проверить не удалось.
+    Возвращает действительных, {id: причина} недействительных и
+    {id: ошибка} непроверенных арендаторов.
+    """
+    valid, invalid, unknown = [], {}, {}
+    if not tenants:
+        return valid, invalid, unknown
+    with ThreadPoolExecutor(
+            min(workers, len(tenants)),
+            thread_name_prefix='validate') as pool:
+        futures = {pool.submit(probe, tenant): tenant for tenant in tenants}
+        for future in as_completed(futures):
+            tenant_id = futures[future].id
+            try:
+                future.result()
+            except InvalidCredentials as error:
+                invalid[tenant_id] = str(error)
+            except Exception as error:
+                unknown[tenant_id] = str(error)
+            else:
+                valid.append(tenant_id)
+    return valid, invalid, unknown
+
+
+class BackgroundCheck:
+    """Выполняет проверку в фоновом потоке, не больше одной одновременно.
+
+    Запрос, пришедший во время идущей проверки, не теряется: после неё
+    проверка выполняется ещё раз с аргументами последнего запроса.
+    """
+
+    def __init__(self, check, name='validate'):
+        """``name`` — имя фонового потока проверки."""
+        self.check = check
+        self.name = name
+        self.lock = threading.Lock()
+        self.thread = None
+        self.again = None
+
+    @property
+    def running(self):
+        """Идёт ли сейчас проверка."""
+        return self.thread is not None
+
+    def request(self, *args):
+        """Запускает проверку или откладывает её до конца идущей."""
+        with self.lock:
+            if self.thread is not None:
+                self.again = args
+                return
+            self.thread = threading.Thread(
+                target=self.run, args=args, name=self.name, daemon=True)
+            self.thread.start()
+
+    def run(self, *args):
+        """Выполняет проверку, пока есть отложенные запросы."""
+        while True:
+            try:
+                self.check(*args)
+            except Exception as error:
+                logger.exception(CHECK_FAILED.format(error=error))
+            with self.lock:
+                if self.again is None:
+                    self.thread = None
+                    return
+                args, self.again = self.again, None
+
+    def join(self, timeout=None):
+        """Ждёт окончания идущей проверки."""
+        thread = self.thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+class Quarantine:
+    """Арендаторы с недействительными данными, которых бот не опрашивает.
+
+    При наличии хранилища карантин и время последней проверки сохраняются
+    в нём и переживают перезапуск и разовые запуски.
+    """
+
+    def __init__(self, store=None, clock=time.time):
+        """Загружает карантин из хранилища, если оно задано."""
+        self.store = store
+        self.clock = clock
+        self.reasons = {}
+        self.checked = None
+        if store is not None:
+            self.reasons = dict(store.items(NAMESPACE))
+            self.checked = store.get(CHECKED_KEY, 'time')
+
+    def __contains__(self, tenant_id):
+        """Находится ли арендатор в карантине."""
+        return tenant_id in self.reasons
+
+    def __len__(self):
+        """Число арендаторов в карантине."""
+        return len(self.reasons)
+
+    def add(self, tenant_id, reason):
+        """Помещает арендатора в карантин с указанием причины."""
+        self.reasons[tenant_id] = reason
+        if self.store is not None:
+            self.store.set(NAMESPACE, tenant_id, reason)
+
+    def discard(self, tenant_id):
+        """Выводит арендатора из карантина."""
+        if self.reasons.pop(tenant_id, None) is not None and (
+                self.store is not None):
+            self.store.delete(NAMESPACE, tenant_id)
+
+    def due(self, period):
+        """Пора ли перепроверять арендаторов."""
+        if self.checked is None:
+            return True
+        return bool(period) and self.clock() - self.checked >= period
+
+    def mark_checked(self):
+        """Запоминает время последней проверки."""
+        self.checked = self.clock()
+        if self.store is not None:
+            self.store.set(CHECKED_KEY, 'time', self.checked)
@@ -0,0 +1,54 @@
+import time
+
+OVERLAP = 60
+NAMESPACE = 'window'
+
+
+class PollWindow:
+    """Окно параметра from_date для запросов к API.
+
+    Курсор сдвигается после каждого успешного опроса, а не после отправки
+    сообщений, поэтому окно не растёт в тихие периоды. Запрос захватывает
+    ``overlap`` секунд до курсора на случай расхождения часов; повторно
+    полученные переходы отсекает дедупликация. Недоставленный переход
+    удерживает курсор на своей дате, чтобы попасть в следующий ответ.
+    Начальный ``cursor`` можно передать явно, например из снимка
+    состояния: более старый курсор лишь расширяет первый запрос.
+    """
+
+    def __init__(self, key, overlap=OVERLAP, store=None, clock=time.time,
+                 cursor=None):
+        """Без ``cursor`` курсор берётся из хранилища или часов."""
+        self.key = str(key)
+        self.overlap = overlap
+        self.store = store
+        self.clock = clock
+        self.cursor = cursor
+        self.polled = None
+        if self.cursor is None and store is not None:
+            self.cursor = store.get(NAMESPACE, self.key)
+        if self.cursor is None:
+            self.cursor = int(clock())
+
+    @property
+    def from_date(self):
+        """Начало окна запроса: курсор минус перекрытие."""
+        return max(0, self.cursor - self.overlap)
+
+    def advance(self, current_date=None, pending=()):
+        """Сдвигает курсор после успешного опроса.
+
+        ``pending`` — даты обновления недоставленных переходов. Переходы
+        без целочисленной даты курсор не удерживают: иначе одна домашка
+        с пустой или непонятной датой навсегда остановила бы окно.
+        """
+        self.polled = self.clock()
+        if not isinstance(current_date, int):
+            current_date = int(self.clock())
+        cursor = min([current_date, *(
+            date for date in pending if isinstance(date, int))])
+        if cursor > self.cursor:
+            self.cursor = cursor
+            if self.store is not None:
+                self.store.set(NAMESPACE, self.key, cursor)
+        return self.cursor